@@ -1,72 +1,131 @@
 #!/usr/bin/env python3
 """
-Скрипт для создания тестовых аудиофайлов (без внешних зависимостей).
+Скрипт для создания тестовых аудиофайлов.
 
-Генерирует WAV-файлы с помощью стандартной библиотеки (wave, struct, math, random):
+Генерирует WAV-файлы с помощью NumPy и стандартной библиотеки (wave):
 - test_music.wav  — чистый синус 440 Гц (3 сек)
 - test_noise.wav  — белый шум (2 сек)
 - test_speech.wav — смесь синуса и шума (3 сек), имитирует речь
 """
 
+import json
 import os
 import sys
-import math
-import random
-import struct
 import wave
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
 
 
 SAMPLE_RATE = 44100  # Гц
 SAMPLE_WIDTH = 2     # 16 бит
 NUM_CHANNELS = 1     # моно
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.flac')
+CHUNK_SAMPLES = 262144  # сэмплов в чанке потоковой записи (512 КБ int16)
+TABLE_BLOCK = SAMPLE_RATE // 2  # длина таблиц осцилляторов округляется вверх до 0.5 сек
+GENERATOR_VERSION = 2  # версия генераторов: при изменении синтеза увеличить, и файлы будут пересозданы
+MANIFEST_NAME = '.test_files.json'  # в examples/: имя файла → версия генератора и размер WAV
+
+
+def _clip_int16(values: np.ndarray) -> np.ndarray:
+    """Обрезает массив в диапазон 16-битового PCM (дробная часть отбрасывается) и возвращает int16."""
+    if values.dtype.kind == 'f':
+        values = np.trunc(values, out=values)
+    return np.clip(values, -32768, 32767, out=values).astype(np.int16, copy=False)
 
 
-def _clip_int16(value: float) -> int:
-    """Обрезает значение в диапазон 16-битового PCM и возвращает int."""
-    return max(-32768, min(32767, int(value)))
+def _pcm_bytes(samples: Union[list[int], np.ndarray]) -> bytes:
+    """Упаковывает сэмплы в little-endian 16-bit signed PCM.
+
+    Для int16 ndarray на little-endian платформе это одно копирование буфера, без
+    промежуточного списка Python int; списки приводятся к массиву одним проходом в C.
+    """
+    return np.ascontiguousarray(samples, dtype='<i2').tobytes()
 
 
-def _write_wav(path: Path, samples: list[int]) -> None:
-    """Записывает массив int16 сэмплов в WAV-файл."""
+def _write_wav(path: Path, samples: Union[list[int], np.ndarray, Iterable[np.ndarray]]) -> None:
+    """Записывает int16 сэмплы (список, ndarray или поток чанков ndarray) в WAV-файл."""
     with wave.open(str(path), 'wb') as wf:
         wf.setnchannels(NUM_CHANNELS)
         wf.setsampwidth(SAMPLE_WIDTH)
         wf.setframerate(SAMPLE_RATE)
-        # Упаковываем в little-endian 16-bit signed
-        frames = struct.pack('<' + 'h' * len(samples), *samples)
-        wf.writeframes(frames)
+        if isinstance(samples, (list, np.ndarray)):
+            # Размер данных известен заранее: заголовок пишется один раз с итоговыми
+            # длинами, и wave не возвращается к нему (seek) для правки при закрытии
+            wf.setnframes(len(samples) // NUM_CHANNELS)
+            wf.writeframes(_pcm_bytes(samples))
+        else:
+            # Поток чанков: в памяти только текущий чанк, длины в заголовке
+            # правятся один раз при закрытии файла
+            for chunk in samples:
+                wf.writeframesraw(_pcm_bytes(chunk))
+
+
+def generate_sine_chunks(duration_s: float, freq_hz: float, amplitude: float = 0.5,
+                         chunk_samples: int = CHUNK_SAMPLES) -> Iterator[np.ndarray]:
+    """Генерирует синусоидальный сигнал чанками по chunk_samples сэмплов."""
+    num_samples = int(SAMPLE_RATE * duration_s)
+    amp = amplitude * 32767.0
+    for start in range(0, num_samples, chunk_samples):
+        n = np.arange(start, min(start + chunk_samples, num_samples), dtype=np.float64)
+        yield _clip_int16(amp * np.sin(2.0 * np.pi * freq_hz * n / SAMPLE_RATE))
 
 
-def generate_sine(duration_s: float, freq_hz: float, amplitude: float = 0.5) -> list[int]:
+def generate_sine(duration_s: float, freq_hz: float, amplitude: float = 0.5) -> np.ndarray:
     """Генерирует синусоидальный сигнал заданной длительности и частоты."""
+    return _join_chunks(generate_sine_chunks(duration_s, freq_hz, amplitude))
+
+
+def generate_white_noise_chunks(duration_s: float, amplitude: float = 0.4, rng: Optional[np.random.Generator] = None,
+                                chunk_samples: int = CHUNK_SAMPLES) -> Iterator[np.ndarray]:
+    """Генерирует белый шум чанками по chunk_samples сэмплов."""
     num_samples = int(SAMPLE_RATE * duration_s)
     amp = amplitude * 32767.0
-    samples = []
-    for n in range(num_samples):
-        value = amp * math.sin(2.0 * math.pi * freq_hz * (n / SAMPLE_RATE))
-        samples.append(_clip_int16(value))
-    return samples
+    rng = rng if rng is not None else np.random.default_rng()
+    for start in range(0, num_samples, chunk_samples):
+        yield _clip_int16(rng.uniform(-amp, amp, min(chunk_samples, num_samples - start)))
 
 
-def generate_white_noise(duration_s: float, amplitude: float = 0.4) -> list[int]:
+def generate_white_noise(duration_s: float, amplitude: float = 0.4, rng: Optional[np.random.Generator] = None) -> np.ndarray:
     """Генерирует белый шум."""
-    num_samples = int(SAMPLE_RATE * duration_s)
-    amp = amplitude * 32767.0
-    return [_clip_int16(random.uniform(-amp, amp)) for _ in range(num_samples)]
+    return _join_chunks(generate_white_noise_chunks(duration_s, amplitude, rng))
+
 
+@lru_cache(maxsize=32)
+def _oscillator_table(freqs: tuple[float, ...], weights: tuple[float, ...], table_len: int) -> np.ndarray:
+    """Предвычисляет взвешенную сумму синусов freqs на table_len сэмплов (только для чтения).
 
-def mix_signals(a: list[int], b: list[int], gain_a: float = 1.0, gain_b: float = 1.0) -> list[int]:
+    Ноты и гласные повторяются с одними и теми же частотами, поэтому тригонометрия
+    считается один раз, а генераторы лишь берут срез таблицы нужной длины.
+    """
+    t = np.arange(table_len) / SAMPLE_RATE
+    table = np.sin(2 * np.pi * np.multiply.outer(t, np.array(freqs))) @ np.array(weights)
+    table.setflags(write=False)
+    return table
+
+
+def _oscillator(freqs: tuple[float, ...], weights: tuple[float, ...], num_samples: int) -> np.ndarray:
+    """Возвращает первые num_samples сэмплов таблицы осциллятора."""
+    table_len = -(-num_samples // TABLE_BLOCK) * TABLE_BLOCK
+    return _oscillator_table(freqs, weights, table_len)[:num_samples]
+
+
+def _join_chunks(chunks: Iterable[np.ndarray]) -> np.ndarray:
+    """Собирает чанки int16 в один массив."""
+    return np.concatenate([np.zeros(0, dtype=np.int16), *chunks])
+
+
+def mix_signals(a: np.ndarray, b: np.ndarray, gain_a: float = 1.0, gain_b: float = 1.0) -> np.ndarray:
     """Смешивает два сигнала одинаковой длины с заданными коэффициентами усиления."""
     length = min(len(a), len(b))
-    mixed = []
-    for i in range(length):
-        value = a[i] * gain_a + b[i] * gain_b
-        mixed.append(_clip_int16(value))
-    return mixed
+    mixed = np.asarray(a[:length], dtype=np.float64) * gain_a + np.asarray(b[:length], dtype=np.float64) * gain_b
+    return _clip_int16(mixed)
 
 
-def generate_music_with_rhythm(total_duration_s: float = 4.0, bpm: int = 120) -> list[int]:
+def generate_music_with_rhythm(total_duration_s: float = 4.0, bpm: int = 120) -> np.ndarray:
     """Генерирует простую музыкальную зарисовку: метроном + мелодия из нескольких нот.
 
     - Ритм: короткие щелчки (высокочастотные импульсы) на каждую долю
@@ -74,20 +133,20 @@ def generate_music_with_rhythm(total_duration_s: float = 4.0, bpm: int = 120) ->
     """
     beat_len_s = 60.0 / bpm
     num_samples_total = int(SAMPLE_RATE * total_duration_s)
-    samples = [0] * num_samples_total
+    # Накопитель int32: сумма вкладов не переполняется, обрезка до int16 — один раз в конце
+    samples = np.zeros(num_samples_total, dtype=np.int32)
 
     # 1) Ритм: на каждую долю добавляем короткий щелчок (импульс с экспоненциальным спадом)
     click_len = int(SAMPLE_RATE * 0.02)  # 20 ms
+    # Высокочастотный щелчок (8 кГц) с быстрым спадом — одна форма волны на все доли
+    t = np.arange(click_len) / SAMPLE_RATE
+    click = (np.sin(2 * np.pi * 8000 * t) * np.exp(-t * 80) * 0.4 * 32767).astype(np.int32)
     for beat_idx in range(int(total_duration_s / beat_len_s) + 1):
         start = int(beat_idx * beat_len_s * SAMPLE_RATE)
-        for i in range(click_len):
-            idx = start + i
-            if idx >= num_samples_total:
-                break
-            # Высокочастотный щелчок (8 кГц) с быстрым спадом
-            t = i / SAMPLE_RATE
-            val = math.sin(2 * math.pi * 8000 * t) * math.exp(-t * 80)
-            samples[idx] = _clip_int16(samples[idx] + int(val * 0.4 * 32767))
+        end = min(start + click_len, num_samples_total)
+        if start >= end:
+            break
+        samples[start:end] += click[:end - start]
 
     # 2) Мелодия: несколько нот по полудоле
     notes = [440.0, 523.25, 659.25, 587.33]  # A4, C5, E5, D5
@@ -98,74 +157,75 @@ def generate_music_with_rhythm(total_duration_s: float = 4.0, bpm: int = 120) ->
         freq = notes[note_idx % len(notes)]
         dur = min(int(note_duration_s * SAMPLE_RATE), num_samples_total - pos)
         env = _adsr_envelope(dur, a=0.01, d=0.05, s_level=0.85, r=0.05)
-        for i in range(dur):
-            t = i / SAMPLE_RATE
-            val = math.sin(2 * math.pi * freq * t) * env[i]
-            samples[pos + i] = _clip_int16(samples[pos + i] + int(val * 0.35 * 32767))
+        note = _oscillator((freq,), (1.0,), dur) * env
+        note *= 0.35
+        note *= 32767
+        samples[pos:pos + dur] += note.astype(np.int32)
         pos += dur
         note_idx += 1
 
-    return samples
-
-def _adsr_envelope(total_len: int, a: float = 0.03, d: float = 0.05, s_level: float = 0.7, r: float = 0.07) -> list[float]:
-    """Генерирует простую ADSR-огибающую длиной total_len сэмплов."""
-    attack = int(total_len * a)
-    decay = int(total_len * d)
-    release = int(total_len * r)
-    sustain = total_len - attack - decay - release
-    if sustain < 0:
-        sustain = 0
-    env = []
-    # Attack
-    for i in range(max(attack, 1)):
-        env.append(i / max(attack, 1))
-    # Decay
-    for i in range(max(decay, 1)):
-        t = i / max(decay, 1)
-        env.append(1.0 - t * (1.0 - s_level))
-    # Sustain
-    env.extend([s_level] * max(sustain, 0))
-    # Release
-    for i in range(max(release, 1)):
-        t = 1.0 - (i / max(release, 1))
-        env.append(s_level * max(t, 0.0))
+    return _clip_int16(samples)
+
+@lru_cache(maxsize=64)
+def _adsr_envelope(total_len: int, a: float = 0.03, d: float = 0.05, s_level: float = 0.7, r: float = 0.07) -> np.ndarray:
+    """Генерирует простую ADSR-огибающую длиной total_len сэмплов.
+
+    Результат кэшируется по аргументам и возвращается только для чтения.
+    """
+    attack = max(int(total_len * a), 1)
+    decay = max(int(total_len * d), 1)
+    release = max(int(total_len * r), 1)
+    sustain = max(total_len - int(total_len * a) - int(total_len * d) - int(total_len * r), 0)
+    env = np.concatenate([
+        np.arange(attack) / attack,                                # Attack
+        1.0 - (np.arange(decay) / decay) * (1.0 - s_level),        # Decay
+        np.full(sustain, s_level),                                 # Sustain
+        s_level * np.maximum(1.0 - np.arange(release) / release, 0.0),  # Release
+    ])
     # Нормализация длины
-    return env[:total_len]
+    env = env[:total_len]
+    env.setflags(write=False)
+    return env
 
 
-def _formant_vowel(duration_s: float, base_freq: float, formants: list[float], amplitude: float = 0.4) -> list[int]:
+def _formant_vowel(duration_s: float, base_freq: float, formants: list[float], amplitude: float = 0.4) -> np.ndarray:
     """Генерирует гласный звук с набором формант (сумма нескольких синусов)."""
     num_samples = int(SAMPLE_RATE * duration_s)
     env = _adsr_envelope(num_samples)
-    samples = []
-    for n in range(num_samples):
-        t = n / SAMPLE_RATE
-        # Базовый тон (псевдо-основа речи)
-        val = math.sin(2 * math.pi * base_freq * t)
-        # Форманты (усиливаем определенные частоты)
-        for idx, f in enumerate(formants, start=1):
-            val += 0.6 / idx * math.sin(2 * math.pi * f * t)
-        samples.append(_clip_int16(val * amplitude * 32767.0 * env[n]))
-    return samples
-
-
-def _consonant_noise(duration_s: float, amplitude: float = 0.25) -> list[int]:
+    # Базовый тон (псевдо-основа речи) и форманты (усиливаем определенные частоты)
+    freqs = (base_freq, *formants)
+    weights = (1.0, *(0.6 / idx for idx in range(1, len(formants) + 1)))
+    # Масштаб и огибающая применяются на месте в одном буфере — без промежуточных массивов
+    val = _oscillator(freqs, weights, num_samples) * amplitude
+    val *= 32767.0
+    val *= env
+    return _clip_int16(val)
+
+
+def _consonant_noise(duration_s: float, amplitude: float = 0.25, rng: Optional[np.random.Generator] = None) -> np.ndarray:
     """Короткая шумовая согласная (например, 'с', 'ш')."""
     num_samples = int(SAMPLE_RATE * duration_s)
     env = _adsr_envelope(num_samples, a=0.01, d=0.02, s_level=0.6, r=0.03)
     amp = amplitude * 32767.0
-    return [_clip_int16(random.uniform(-amp, amp) * env[n]) for n in range(num_samples)]
-
-
-def _concat(parts: list[list[int]]) -> list[int]:
-    """Конкатенирует несколько массивов сэмплов."""
+    rng = rng if rng is not None else np.random.default_rng()
+    # Шум, огибающая и обрезка до int16 — в одном буфере, без промежуточных копий
+    values = rng.uniform(-amp, amp, num_samples)
+    values *= env
+    return _clip_int16(values)
+
+
+def _concat(parts: list[Union[list[int], np.ndarray]]) -> Union[list[int], np.ndarray]:
+    """Конкатенирует несколько массивов сэмплов (ndarray — одним копированием)."""
+    if all(isinstance(p, np.ndarray) for p in parts):
+        # Пустой массив в начале — чтобы пустой список частей не ломал concatenate
+        return np.concatenate([np.zeros(0, dtype=np.int16), *parts]).astype(np.int16, copy=False)
     out: list[int] = []
     for p in parts:
         out.extend(p)
     return out
 
 
-def generate_speech_like_sequence(total_duration_s: float = 3.0) -> list[int]:
+def generate_speech_like_sequence(total_duration_s: float = 3.0) -> np.ndarray:
     """Генерирует последовательность, похожую на слоги речи (≈ total_duration_s)."""
     # Набор «гласных» с формантами (приближенно):
     vowels = [
@@ -179,69 +239,152 @@ def generate_speech_like_sequence(total_duration_s: float = 3.0) -> list[int]:
     base_freqs = [110.0, 140.0, 180.0]  # псевдо-основной тон речи (разный «голос»)
 
     # Составим простую фразу из чередования согласных и гласных
-    parts: list[list[int]] = []
+    parts: list[np.ndarray] = []
     target_len = int(SAMPLE_RATE * total_duration_s)
     current_len = 0
-    random.seed(42)
-    while current_len < target_len:
+    rng = np.random.default_rng(42)
+    # Параметры слогов генерируются пачкой: слог не короче 0.05 + 0.12 + 0.03 = 0.2 сек
+    max_syllables = int(total_duration_s / 0.2) + 1
+    cons_durs = 0.05 + rng.random(max_syllables) * 0.05
+    vowel_durs = 0.12 + rng.random(max_syllables) * 0.18
+    pause_durs = 0.03 + rng.random(max_syllables) * 0.05
+    vowel_idx = rng.integers(0, len(vowels), max_syllables)
+    base_idx = rng.integers(0, len(base_freqs), max_syllables)
+    for k in range(max_syllables):
+        if current_len >= target_len:
+            break
         # Согласная
-        cons = _consonant_noise(duration_s=0.05 + random.random() * 0.05, amplitude=0.2)
+        cons = _consonant_noise(duration_s=cons_durs[k], amplitude=0.2, rng=rng)
         parts.append(cons)
         current_len += len(cons)
         if current_len >= target_len:
             break
         # Гласная
-        vowel_name, formants = random.choice(vowels)
-        base = random.choice(base_freqs)
-        vow = _formant_vowel(duration_s=0.12 + random.random() * 0.18, base_freq=base, formants=formants, amplitude=0.35)
+        vowel_name, formants = vowels[vowel_idx[k]]
+        base = base_freqs[base_idx[k]]
+        vow = _formant_vowel(duration_s=vowel_durs[k], base_freq=base, formants=formants, amplitude=0.35)
         parts.append(vow)
         current_len += len(vow)
 
         # Короткая пауза (тишина)
-        pause_len = int(SAMPLE_RATE * (0.03 + random.random() * 0.05))
-        parts.append([0] * pause_len)
+        pause_len = int(SAMPLE_RATE * pause_durs[k])
+        parts.append(np.zeros(pause_len, dtype=np.int16))
         current_len += pause_len
 
     # Обрезаем/подгоняем точную длину
     concat = _concat(parts)
     return concat[:target_len]
-def create_test_audio_files() -> None:
-    """Создает тестовые WAV-аудиофайлы в папке examples/."""
-    out_dir = Path('examples')
-    out_dir.mkdir(parents=True, exist_ok=True)
+def _load_manifest(out_dir: Path) -> dict:
+    """Читает манифест сгенерированных файлов (пустой, если его нет или он повреждён)."""
+    try:
+        with open(out_dir / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def _is_up_to_date(path: Path, manifest: dict) -> bool:
+    """Проверяет, что файл создан текущей версией генератора и с тех пор не заменён.
+
+    Время изменения не используется: после git checkout оно не говорит,
+    какой версией скрипта создан файл.
+    """
+    entry = manifest.get(path.name)
+    if not isinstance(entry, dict) or entry.get('version') != GENERATOR_VERSION:
+        return False
+    try:
+        return path.stat().st_size == entry.get('size')
+    except OSError:
+        return False
+
 
-    # 1) Музыка: ритм + несколько нот (≈ 4 сек, 120 BPM)
-    print("Создаю тестовый музыкальный файл (ритм + несколько нот, ≈4 сек)...")
-    music_samples = generate_music_with_rhythm(total_duration_s=4.0, bpm=120)
-    _write_wav(out_dir / 'test_music.wav', music_samples)
+def _make_music(path: Path) -> None:
+    """Ритм + несколько нот (≈ 4 сек, 120 BPM)."""
+    _write_wav(path, generate_music_with_rhythm(total_duration_s=4.0, bpm=120))
 
-    # 2) Шум: белый шум, 2 секунды
-    print("Создаю тестовый файл с шумом (2 сек)...")
-    noise_samples = generate_white_noise(duration_s=2.0, amplitude=0.5)
-    _write_wav(out_dir / 'test_noise.wav', noise_samples)
 
-    # 3) «Речь»: синтетические слоги с огибающей и формантами (≈ 3 сек)
-    print("Создаю тестовый файл, имитирующий речь (≈3 сек)...")
-    speech_like = generate_speech_like_sequence(total_duration_s=3.0)
-    _write_wav(out_dir / 'test_speech.wav', speech_like)
+def _make_noise(path: Path) -> None:
+    """Белый шум, 2 секунды (пишется потоково, чанками)."""
+    _write_wav(path, generate_white_noise_chunks(duration_s=2.0, amplitude=0.5, rng=np.random.default_rng(0)))
 
-    print("✅ Тестовые аудиофайлы созданы в папке examples/:")
-    print("   - test_music.wav (музыка)")
-    print("   - test_noise.wav (шум)")
-    print("   - test_speech.wav (речь)")
+
+def _make_speech(path: Path) -> None:
+    """Синтетические слоги с огибающей и формантами (≈ 3 сек)."""
+    _write_wav(path, generate_speech_like_sequence(total_duration_s=3.0))
+
+
+# Имя файла → (функция генерации, сообщение). Функции модульного уровня,
+# чтобы их можно было передать в дочерний процесс.
+TEST_FILES = (
+    ('test_music.wav', _make_music, "Создаю тестовый музыкальный файл (ритм + несколько нот, ≈4 сек)..."),
+    ('test_noise.wav', _make_noise, "Создаю тестовый файл с шумом (2 сек)..."),
+    ('test_speech.wav', _make_speech, "Создаю тестовый файл, имитирующий речь (≈3 сек)..."),
+)
+
+
+def create_test_audio_files(force: bool = False) -> None:
+    """Создает тестовые WAV-аудиофайлы в папке examples/.
+
+    Генерация детерминирована, поэтому уже созданные и актуальные файлы
+    не пересинтезируются (если не передан force=True). Независимые файлы
+    синтезируются параллельно в отдельных процессах; каждый процесс сам
+    пишет свой WAV, так что массивы сэмплов не гоняются через pickle.
+    """
+    out_dir = Path('examples')
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = _load_manifest(out_dir)
+    pending = []
+    skipped = []
+    for name, make, message in TEST_FILES:
+        path = out_dir / name
+        if not force and _is_up_to_date(path, manifest):
+            print(f"⏭ {path.name} актуален — пропускаю")
+            skipped.append(name)
+        else:
+            print(message)
+            pending.append((make, path))
+
+    if len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=len(pending)) as executor:
+            futures = [executor.submit(make, path) for make, path in pending]
+            for future in futures:
+                future.result()
+    else:
+        # Один файл — запуск отдельного процесса дороже самой генерации
+        for make, path in pending:
+            make(path)
+
+    for _, path in pending:
+        manifest[path.name] = {'version': GENERATOR_VERSION, 'size': path.stat().st_size}
+    if pending:
+        with open(out_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    kinds = {'test_music.wav': 'музыка', 'test_noise.wav': 'шум', 'test_speech.wav': 'речь'}
+    if pending:
+        print("✅ Тестовые аудиофайлы созданы в папке examples/:")
+        for _, path in pending:
+            print(f"   - {path.name} ({kinds[path.name]})")
+    if skipped:
+        print("⏭ Уже актуальны (не пересоздавались):")
+        for name in skipped:
+            print(f"   - {name} ({kinds[name]})")
 
 
 def check_existing_files() -> None:
     """Проверяет существующие файлы в папке examples"""
-    examples_dir = Path('examples')
-    if not examples_dir.exists():
+    try:
+        # Один проход scandir: DirEntry отдаёт имя и тип без отдельного stat на файл
+        with os.scandir('examples') as it:
+            audio_files = [
+                entry.name for entry in it
+                if entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(AUDIO_EXTENSIONS)
+            ]
+    except FileNotFoundError:
         return
     
-    audio_files = []
-    for file_path in examples_dir.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in {'.mp3', '.wav', '.m4a', '.flac'}:
-            audio_files.append(file_path.name)
-    
     if audio_files:
         print(f"\n📁 Найдены существующие аудиофайлы в examples/:")
         for file_name in audio_files:
@@ -253,7 +396,8 @@ if __name__ == "__main__":
     print("=" * 50)
     
     check_existing_files()
-    create_test_audio_files()
+    # --force: пересоздать файлы, даже если они актуальны
+    create_test_audio_files(force='--force' in sys.argv[1:])
     
     print("\n✅ Готово! Теперь можно тестировать аудиоанализатор:")
     print("   python main.py examples")
@@ -8,39 +8,101 @@
 """
 
 import argparse
+import atexit
+import contextvars
+import hashlib
+import io
+import json
 import logging
+import mmap
 import os
+import queue
+import re
+import sqlite3
 import sys
 import tempfile
+import threading
+import time
 import warnings
-from datetime import datetime
-from contextlib import contextmanager, redirect_stderr, redirect_stdout
-import io
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing, contextmanager, nullcontext, redirect_stderr, redirect_stdout
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 
-import openai
-from dotenv import load_dotenv
-
-# Подавляем предупреждения FFmpeg и других библиотек
-warnings.filterwarnings("ignore", category=UserWarning)
-warnings.filterwarnings("ignore", message=".*FFmpeg.*")
-warnings.filterwarnings("ignore", message=".*torchaudio.*")
-warnings.filterwarnings("ignore", message=".*demucs.*")
+# openai, python-dotenv и pydub импортируются лениво (см. _import_openai/_load_environment/
+# _import_audio_segment), чтобы короткие запуски вроде --help не платили за загрузку тяжёлых зависимостей
+openai = None
 
 # Опциональные зависимости
 try:
-    from pydub import AudioSegment
+    import orjson  # Быстрый разбор JSON-ответов ИИ (при отсутствии — стандартный json)
 except ImportError:
-    AudioSegment = None
+    orjson = None
 
 # Отключаем загрузку расширений torio FFmpeg, чтобы избежать ошибок libtorio_ffmpeg*.pyd
 # Используем системный ffmpeg и подавляем расширения torio FFmpeg
 os.environ["TORIO_DISABLE_EXTENSIONS"] = "1"
 os.environ["TORIO_LOG_LEVEL"] = "ERROR"
 
-# Загружаем переменные окружения
-load_dotenv()
+_environment_loaded = False
+
+
+def _load_environment() -> None:
+    """
+    Однократно загружает переменные окружения из .env и подавляет
+    предупреждения FFmpeg и других библиотек.
+    """
+    global _environment_loaded
+    if _environment_loaded:
+        return
+
+    from dotenv import load_dotenv
+
+    # Подавляем предупреждения FFmpeg и других библиотек
+    warnings.filterwarnings("ignore", category=UserWarning)
+    warnings.filterwarnings("ignore", message=".*FFmpeg.*")
+    warnings.filterwarnings("ignore", message=".*torchaudio.*")
+    warnings.filterwarnings("ignore", message=".*demucs.*")
+
+    # Загружаем переменные окружения
+    load_dotenv()
+    _environment_loaded = True
+
+
+def _json_loads(text: str):
+    """
+    Разбирает JSON через orjson, если он установлен. Ошибки разбора в обоих
+    случаях — json.JSONDecodeError (orjson.JSONDecodeError наследуется от него).
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+@lru_cache(maxsize=1)
+def _import_audio_segment():
+    """
+    Импортирует pydub.AudioSegment при первой конвертации; None, если pydub не установлен.
+    """
+    try:
+        from pydub import AudioSegment
+    except ImportError:
+        return None
+    return AudioSegment
+
+
+def _import_openai():
+    """
+    Импортирует модуль openai при первом обращении и возвращает его.
+    """
+    global openai
+    if openai is None:
+        import openai as openai_module
+        openai = openai_module
+    return openai
 
 # =============================================================================
 # Единые значения по умолчанию и промты
@@ -52,6 +114,9 @@ DEFAULT_SECONDARY_LANGUAGE = "en"
 
 # Настройки аудио
 SUPPORTED_AUDIO_FORMATS = ['.mp3', '.wav', '.m4a', '.flac']
+_SUPPORTED_AUDIO_SUFFIXES = frozenset(SUPPORTED_AUDIO_FORMATS)
+# Форматы, которые OpenAI API принимает напрямую (конвертация через ffmpeg не нужна)
+OPENAI_ACCEPTED_AUDIO_FORMATS = frozenset({'.mp3', '.m4a', '.wav', '.ogg', '.webm', '.flac', '.mp4', '.mpga', '.mpeg'})
 DEFAULT_FOLDER = "examples"
 
 # Настройки Demucs (оптимизированы для лучшего качества разделения вокала)
@@ -61,6 +126,8 @@ DEMUCS_OVERLAP = 0.4  # Большее перекрытие улучшает к
 DEMUCS_DEVICE = "cuda"  # Устройство: "cpu" или "cuda"
 DEMUCS_JOBS = 4  # Количество потоков (1-4)
 DEMUCS_TWO_STEMS = "vocals"  # Извлекать только вокал для ускорения
+DEMUCS_BATCH_SIZE = 4  # Треков в одном прогоне Demucs на GPU при пакетной обработке
+DEMUCS_PRECISION = "auto"  # "auto" (FP16 на CUDA с compute capability >= 7.0, иначе FP32), "fp32", "fp16", "bf16", "int8" (динамическое квантование, только CPU)
 
 # Настройки librosa
 VOCAL_FREQ_MIN = 80
@@ -69,24 +136,51 @@ VOCAL_FREQ_PARTIAL_MIN = 8000
 VOCAL_FREQ_PARTIAL_MAX = 16000
 VOCAL_MASK_FULL = 1.0
 VOCAL_MASK_PARTIAL = 0.5
+MUSIC_ANALYSIS_SR = 16000  # Частота дискретизации для проверки на инструментальную музыку
+MUSIC_ANALYSIS_MAX_SECONDS = 30.0  # Анализируется только начало файла
+MUSIC_PULSE_MIN_LAG = 4  # Минимальный лаг автокорреляции онсетов, кадров (512 отсчётов)
+MUSIC_PULSE_MAX_LAG = 512  # Максимальный лаг автокорреляции онсетов, кадров
+MUSIC_MIN_PULSE = 0.5  # Регулярность пульса: песни ≥ 0,58, речь ≤ 0,31, гул двигателя ≈ 0,37, шум ≤ 0,15
+MUSIC_MIN_ONSET_MEAN = 1.0  # Средняя онсет-энергия: у стационарного шума ≈ 0,7–0,8
+MUSIC_MIN_CHROMA_VAR = 0.02  # Вариативность хромы: у шума ≈ 0,003–0,006
+MUSIC_MIN_HARMONIC_RATIO = 0.40  # Доля гармонической энергии по HPSS
+VOCALS_SAMPLE_RATE = 16000  # Частота сохраняемого вокала: достаточна для распознавания и в разы уменьшает загрузку в API
+VOCALS_SUBTYPE = 'PCM_16'  # Формат отсчётов {name}_vocals.wav
+
+# Предварительная проверка на тишину (файл пропускается без обращений к API)
+SILENCE_ANALYSIS_SR = 8000  # Частота дискретизации для проверки
+SILENCE_FRAME_MS = 32  # Длина кадра, мс
+SILENCE_RMS_DBFS = -50.0  # Кадр тише этого уровня считается тишиной
+SILENCE_HISS_DBFS = -30.0  # Тихий кадр с «плоским» спектром (шипение, фон) тоже считается тишиной
+SILENCE_ENTROPY_MIN = 0.85  # Нормированная спектральная энтропия «плоского» кадра (0..1)
+SILENCE_MIN_RATIO = 0.95  # Доля тихих кадров, при которой файл считается тишиной
 
 # Пороги для транскрипции
 MIN_RESULT_LENGTH_FOR_ALT_LANG = 10
 MIN_RESULT_LENGTH_FOR_MUSIC_PROMPT = 100
+MIN_ACCEPTABLE_RESULT_LENGTH = 20  # Осмысленный результат такой длины принимается без дальнейших попыток
 MIN_TEXT_LENGTH_FOR_POST_PROCESS = 10
 
 # Настройки оптимизации транскрипции
-MAX_TRANSCRIPTION_ATTEMPTS = 3  # Максимальное количество попыток транскрипции
+MAX_TRANSCRIPTION_ATTEMPTS = 1  # Максимальное количество попыток транскрипции (основной язык, авто, музыкальный промпт, en); до 4 — через --max-attempts
+OVERLAP_MUSIC_ANALYSIS = True  # Попытки транскрипции идут по очереди; музыкальные признаки считаются локально, пока идёт запрос попытки 2
+SENTENCE_END_CHARS = ('.', '!', '?', '…')  # Результат с такой концовкой считается законченной фразой
 SKIP_MUSIC_PROMPT_IF_SHORT = True  # Пропускать музыкальный промпт для коротких результатов
 
 # Настройки LLM
 LLM_MODEL = "gpt-4o-mini"
 LLM_MAX_TOKENS = 500
 LLM_TEMPERATURE = 0.1
+LLM_MAX_CONCURRENT_REQUESTS = 8  # Одновременных запросов при пакетной пост-обработке (ограничение rate limit)
+API_MAX_WORKERS = 8  # Файлов, одновременно распознаваемых и классифицируемых при пакетном анализе
+DEFAULT_OPENAI_RPM = 500  # Запросов к OpenAI в минуту (переопределяется OPENAI_RPM в окружении/.env; 0 — без ограничения)
 
 # Настройки классификации
 CLASSIFICATION_MAX_TOKENS = 200
 CLASSIFICATION_TEMPERATURE = 0.1
+CLASSIFICATION_BATCH_SIZE = 10  # Транскриптов в одном запросе ИИ-классификации при пакетном анализе
+CLASSIFICATION_BATCH_ITEM_TOKENS = 40  # Лимит токенов ответа на один транскрипт в пакетном запросе
+CLASSIFY_CACHE_FILE = str(Path.home() / ".cache" / "ai_transcribe" / "classify.json")  # Кэш ответов ИИ-классификации (None — только в памяти)
 
 # Настройки логирования
 LOG_DIR = "log"
@@ -96,6 +190,11 @@ DEFAULT_ENABLE_LOGGING = True
 # Настройки пост-обработки по умолчанию
 DEFAULT_ENABLE_POST_PROCESS = True
 
+# Кэш результатов анализа: содержимое файла + настройки → тип аудио и транскрипция
+DEFAULT_ENABLE_RESULT_CACHE = True
+RESULT_CACHE_FILE = str(Path.home() / ".cache" / "ai_transcribe" / "results.sqlite")
+BATCH_CHECKPOINT_SIZE = 64  # Файлов на один проход пакетного конвейера; результаты прохода сразу пишутся в кэш
+
 # Промпты для транскрипции
 TRANSCRIPTION_PROMPT = """Дай дословную ПОЛНУЮ транскрипцию без перевода и перефразирования. Сохраняй язык оригинала, не смешивай языки. Не интерпретируй смысл, не сокращай, не исправляй. Если часть неразборчива — оставь как есть или пропусти без домыслов. ВНИМАНИЕ: Если это музыка с повторяющимся припевом - распознай ВСЕ повторения. Если это плач ребенка или нечеловеческие звуки - НЕ придумывай слова, верни пустую строку.
 
@@ -207,33 +306,424 @@ CLASSIFICATION_PROMPT = """Ты — специализированная сис
   * 0.6–0.89 → умеренная уверенность
   * <0.6 → низкая уверенность, признаки неоднозначны"""
 
+# Дополнение к CLASSIFICATION_PROMPT для классификации нескольких транскриптов одним запросом
+CLASSIFICATION_BATCH_PROMPT = """
+
+Пакетный режим:
+- Тебе передано несколько транскриптов, каждый начинается с номера в квадратных скобках ([0], [1], ...) и отделён строкой ---
+- Классифицируй каждый транскрипт независимо от остальных по правилам выше
+- Вместо одного объекта верни JSON-объект с массивом "items", по элементу для каждого номера, без поля "reasoning":
+{"items": [{"id": 0, "classification": "music | speech | noise"}, {"id": 1, "classification": "music | speech | noise"}]}"""
+
+# Версия дискового кэша классификации: меняется вместе с моделью и промптами
+_CLASSIFY_CACHE_VERSION = hashlib.sha1(
+    f"{LLM_MODEL}\n{CLASSIFICATION_PROMPT}\n{CLASSIFICATION_BATCH_PROMPT}".encode("utf-8")
+).hexdigest()[:16]
+
+
+# Правила доводки русской пунктуации (_polish_punctuation_ru): все замены собраны
+# в одно регулярное выражение с альтернативами, чтобы строка сканировалась один раз.
+# Результат совпадает с последовательным применением правил: фразы, перед которыми
+# запятая заменяется точкой, учитываются в соседних правилах через опережающие проверки
+_SPLIT_PHRASES = r"(?:ч[ёе]\s+ты\s+гонишь|снова\s+мозг\s+мне\s+выносишь)"
+_PUNCT_RULES = re.compile(
+    # Устойчивое выражение
+    r"(?P<idiom>\bне\s+говори\s+мне\b)"
+    # Вопросительная интонация (с разделением длинной фразы, если перед ней запятая);
+    # запятая перед следующей разделяемой фразой заменяется самим «?»
+    r"|(?P<question>(?P<question_comma>,\s*)?\b(?P<question_text>ч[ёе]\s+ты\s+гонишь)"
+    r"(?:\.|(?P<question_next>,\s*)(?=" + _SPLIT_PHRASES + r"))?)"
+    # Разделяем длинные фразы по характерным кускам
+    r"|,\s*(?P<split_text>снова\s+мозг\s+мне\s+выносишь)"
+    # Точка после повелительного в начале
+    r"|^(?P<imperative>Позвони\s+мне)(?:,(?!\s*" + _SPLIT_PHRASES + r")|$)",
+    re.IGNORECASE,
+)
+# Свести множественные пробелы
+_MULTISPACE = re.compile(r"\s+")
+# Нормализуем пробелы перед пунктуацией
+_SPACE_BEFORE_PUNCT = re.compile(r"\s+([,.!?])")
+
+
+def _punct_rule_replacement(match: "re.Match") -> str:
+    """
+    Возвращает замену для сработавшего правила _PUNCT_RULES.
+    """
+    rule = match.lastgroup
+    if rule == "idiom":
+        return "не говори нет"
+    if rule == "question":
+        prefix = ". " if match.group("question_comma") is not None else ""
+        suffix = " " if match.group("question_next") is not None else ""
+        return f"{prefix}{match.group('question_text')}?{suffix}"
+    if rule == "split_text":
+        return f". {match.group('split_text')}"
+    return f"{match.group('imperative')}."
+
+
+# Ключевые фразы промпта транскрипции: если их больше половины в результате,
+# модель вернула промпт вместо текста (_filter_prompt_from_result)
+_PROMPT_KEYWORDS = (
+    "дословную", "полную", "транскрипцию", "без перевода",
+    "сохраняй язык", "не интерпретируй", "не сокращай", "не исправляй"
+)
+_PROMPT_KEYWORDS_RE = re.compile("|".join(re.escape(keyword) for keyword in _PROMPT_KEYWORDS))
+# Короче этого результат не может содержать больше половины ключевых фраз
+_PROMPT_KEYWORDS_MIN_LENGTH = sum(sorted(map(len, _PROMPT_KEYWORDS))[:len(_PROMPT_KEYWORDS) // 2 + 1])
+
+@lru_cache(maxsize=8)
+def _normalized_prompt(prompt: str) -> str:
+    """
+    Промпт в нижнем регистре без крайних пробелов. Промпты — константы модуля,
+    поэтому при фильтрации каждой попытки транскрипции он не пересчитывается.
+    """
+    return prompt.lower().strip()
+
+
+# Эвристики текста транскрипции (_is_likely_hallucination, _looks_like_vocalizations, _looks_like_noise)
+_RE_SYMBOLS_ONLY = re.compile(r'^[.!?,#\-_]+$')
+_RE_NO_LETTERS = re.compile(r'^[^а-яёa-z\s]+$')
+_RE_REPEATED_CHAR = re.compile(r'(.)\1{3,}')  # 4+ одинаковых символа подряд
+_RE_VOWEL_RUN = re.compile(r'[аоуэыиеёюя]{5,}')
+# Повторяющиеся вокальные слоги: каждый слог повторяется сам с собой (la-la, но не «banana»)
+_RE_VOCAL = re.compile(
+    r"\b(?:(?:la)+|(?:na)+|(?:da)+|(?:ba)+|(?:ah|aah|aaa)+|(?:oh|ooh|ooo)+|(?:yeah|yea)+)\b"
+)
+_RE_WORDS = re.compile(r"[a-zа-яё]+")
+_RE_SHORT_TOKEN = re.compile(r"[\W_\-–—~]+|[a-zа-яё]+")
+_RE_HISS = re.compile(r"[шщсзh]+")
+
+
+# Настройки EQ для предочистки и доочистки вокала
+EQ_HPF_HZ = 120.0          # Частота среза HPF (Butterworth 2-го порядка)
+EQ_SHELF_HZ = 10000.0      # Нижняя граница high-shelf
+EQ_PRECLEAN_SHELF_DB = -2.0   # High-shelf при предочистке перед Demucs
+EQ_REFINE_SHELF_DB = -2.0     # High-shelf после вычитания no_vocals
+EQ_CLEANUP_SHELF_DB = -3.0    # High-shelf финальной доочистки вокала
 
 # Настройки производительности
-ENABLE_AUDIO_ENHANCEMENT = True  # Отключаем улучшение аудио по умолчанию для скорости
+ENABLE_AUDIO_ENHANCEMENT = False  # Улучшение аудио выключено по умолчанию для скорости; включается флагом --enhance
 SKIP_DEMUCS_ON_ERROR = False  # Пропускать Demucs при ошибках
+ENABLE_SPEECH_VAD = True  # Не отправлять в API файлы, где Silero VAD не нашёл речи (нужен torch)
+VAD_MODEL_REPO = "snakers4/silero-vad"  # Репозиторий модели для torch.hub
+VAD_SAMPLING_RATE = 16000  # Частота дискретизации входа VAD
+LONG_AUDIO_SPLIT_SECONDS = 120.0  # Более длинные файлы распознаются частями по паузам (VAD), параллельно
+SEGMENT_TARGET_SECONDS = 30.0  # Целевая длина части: соседние фрагменты речи объединяются до этой длины
+
+# Ошибки API текущей задачи (см. AudioAnalyzer._track_api_errors); None — учёт не ведётся
+_API_ERROR_SCOPE: "contextvars.ContextVar[Optional[List[str]]]" = contextvars.ContextVar("api_error_scope", default=None)
+
+# Общий приёмник для подавляемого вывода: без буферов, растущих на болтливых вызовах
+_DEVNULL = open(os.devnull, "w")
+atexit.register(_DEVNULL.close)
+
+# Логгеры сторонних библиотек, которые глушатся до ERROR на время работы Demucs/VAD
+_NOISY_LOGGERS = ("numba", "numba.core", "numba.core.ssa", "demucs", "torio", "torchaudio", "torch.hub")
+
+
+def _quiet_external_libraries() -> None:
+    """
+    Приглушает сторонние библиотеки точечно: переменные окружения расширений
+    torio и уровни их собственных логгеров. Безопасно из любого потока.
+    """
+    os.environ.setdefault("TORIO_LOG_LEVEL", "ERROR")
+    os.environ.setdefault("TORIO_DISABLE_EXTENSIONS", "1")  # игнорировать попытки загрузки ffmpeg расширений
+    # NUMBA_DISABLE_JIT не выставляем: он отключил бы JIT-ядра librosa для всего процесса
+    for name in _NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.ERROR)
+
 
 # Вспомогательный контекстный менеджер для глушения шума сторонних библиотек (torio/ffmpeg/torchaudio/demucs)
 @contextmanager
 def suppress_external_noise():
+    _quiet_external_libraries()
+    # stdout/stderr и глобальный уровень логирования общие для процесса: в фоновом
+    # потоке остаются только логгеры библиотек, чтобы не глушить вывод основного потока
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
     previous_disable_level = logging.root.manager.disable
     try:
         # Понижаем уровень логирования глобально
         logging.disable(logging.CRITICAL)
 
-        # Настраиваем переменные окружения для снижения болтливости расширений
-        os.environ.setdefault("TORIO_LOG_LEVEL", "ERROR")
-        os.environ.setdefault("TORIO_DISABLE_EXTENSIONS", "1")  # игнорировать попытки загрузки ffmpeg расширений
-        os.environ.setdefault("NUMBA_DISABLE_JIT", "1")  # иногда шумит при импортe demucs
-
-        # Отводим stdout/stderr во внутренние буферы на время вызова Demucs
-        fake_out, fake_err = io.StringIO(), io.StringIO()
-        with redirect_stdout(fake_out), redirect_stderr(fake_err):
+        # Отводим stdout/stderr в общий дескриптор /dev/null на время вызова Demucs
+        with redirect_stdout(_DEVNULL), redirect_stderr(_DEVNULL):
             yield
     finally:
         # Восстанавливаем уровень логирования
         logging.disable(previous_disable_level)
 
 
+@contextmanager
+def _mapped_file(path: str):
+    """
+    Отображает файл в память только для чтения и просит ядро читать его вперёд
+    (POSIX_FADV_SEQUENTIAL): декодер и хэширование получают страницы по мере
+    надобности, без копии всего файла в куче. Для пустого файла отдаёт None.
+    """
+    with open(path, 'rb') as f:
+        fd = f.fileno()
+        if not os.fstat(fd).st_size:
+            yield None
+            return
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
+
+def _report_progress(label: str, step: int, total: int, name: str) -> None:
+    """
+    Счётчик прогресса пакетного этапа: в терминале — одна обновляемая строка,
+    при выводе в файл или канал — обычная строка на каждый шаг.
+    """
+    if sys.stdout.isatty():
+        sys.stdout.write(f"\r{label} {step}/{total}: {name}\x1b[K" + ("\n" if step == total else ""))
+        sys.stdout.flush()
+    else:
+        print(f"{label} {step}/{total}: {name}")
+
+
+@lru_cache(maxsize=16)
+def _eq_sos(sr: int, hpf_hz: float, hpf_passes: int, shelf_hz: float, shelf_db: float):
+    """
+    Коэффициенты всей EQ-цепочки в формате SOS: Butterworth HPF 2-го порядка,
+    повторённый hpf_passes раз (каскад секций эквивалентен последовательному
+    применению фильтра), и high-shelf биквад (RBJ Audio EQ Cookbook, S = 1).
+    Shelf пропускается, если его частота выше Найквиста.
+    """
+    import numpy as np
+    from scipy.signal import butter
+
+    sections = [butter(2, hpf_hz, btype='highpass', fs=sr, output='sos')] * hpf_passes
+    if shelf_db and shelf_hz < sr / 2:
+        a = 10 ** (shelf_db / 40)
+        w0 = 2 * np.pi * shelf_hz / sr
+        cos_w0 = np.cos(w0)
+        alpha_term = 2 * np.sqrt(a) * np.sin(w0) / np.sqrt(2)
+        b0 = a * ((a + 1) + (a - 1) * cos_w0 + alpha_term)
+        b1 = -2 * a * ((a - 1) + (a + 1) * cos_w0)
+        b2 = a * ((a + 1) + (a - 1) * cos_w0 - alpha_term)
+        a0 = (a + 1) - (a - 1) * cos_w0 + alpha_term
+        a1 = 2 * ((a - 1) - (a + 1) * cos_w0)
+        a2 = (a + 1) - (a - 1) * cos_w0 - alpha_term
+        sections.append(np.array([[b0, b1, b2, a0, a1, a2]]) / a0)
+    # Не помечаем read-only: sosfilt требует записываемый буфер коэффициентов (но не меняет его)
+    return np.concatenate(sections)
+
+
+@lru_cache(maxsize=4)
+def _vocal_band_gains(sr: int, n_fft: int = 2048):
+    """
+    Столбец усилений маски вокального диапазона (форма (1 + n_fft // 2, 1)) для STFT:
+    VOCAL_MASK_FULL в основном диапазоне голоса, VOCAL_MASK_PARTIAL в частичном, 0 вне их.
+    """
+    import numpy as np
+    import librosa
+    freqs = librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+    gains = np.zeros_like(freqs, dtype=np.float32)
+    gains[(freqs >= VOCAL_FREQ_MIN) & (freqs <= VOCAL_FREQ_MAX)] = VOCAL_MASK_FULL  # Вокальный диапазон
+    gains[(freqs > VOCAL_FREQ_PARTIAL_MIN) & (freqs <= VOCAL_FREQ_PARTIAL_MAX)] = VOCAL_MASK_PARTIAL  # Частично вокальный диапазон
+    gains = gains[:, None]
+    gains.setflags(write=False)
+    return gains
+
+
+@lru_cache(maxsize=1)
+def _median_kernel():
+    """
+    Компилирует (numba, с дисковым кэшем компиляции)
+    скользящую медиану нечётного окна k вдоль строк 2D-массива с отражением краёв,
+    как scipy.ndimage.median_filter(mode='reflect'). Окно хранится отсортированным:
+    на каждом шаге уходящий отсчёт заменяется новым сдвигом вставки — O(k) на
+    отсчёт вместо выбора медианы заново. numba устанавливается вместе с librosa;
+    при её отсутствии возвращает None.
+    """
+    try:
+        import numba
+        import numpy as np
+    except ImportError:
+        return None
+
+    # Без parallel=True: слой потоков numba по умолчанию (workqueue) не допускает
+    # одновременных запусков из разных потоков, а признаки считаются в пулах
+    @numba.njit(cache=True)
+    def median_rows(x, k):
+        rows, n = x.shape
+        half = k // 2
+        out = np.empty_like(x)
+        for r in range(rows):
+            row = x[r]
+            padded = np.empty(n + 2 * half, dtype=x.dtype)
+            for i in range(n + 2 * half):
+                j = i - half
+                while j < 0 or j >= n:
+                    j = -j - 1 if j < 0 else 2 * n - j - 1
+                padded[i] = row[j]
+            window = np.sort(padded[:k])
+            out[r, 0] = window[half]
+            for i in range(1, n):
+                old = padded[i - 1]
+                new = padded[i + k - 1]
+                pos = np.searchsorted(window, old)
+                if new >= old:
+                    while pos < k - 1 and window[pos + 1] < new:
+                        window[pos] = window[pos + 1]
+                        pos += 1
+                else:
+                    while pos > 0 and window[pos - 1] > new:
+                        window[pos] = window[pos - 1]
+                        pos -= 1
+                window[pos] = new
+                out[r, i] = window[half]
+        return out
+
+    return median_rows
+
+
+def _median_filter_1d(x, size: int, axis: int):
+    """
+    Медианный фильтр 2D-массива вдоль одной оси (HPSS в _compute_musicality):
+    ядро numba, а без неё — scipy.ndimage.median_filter с тем же результатом.
+    """
+    import numpy as np
+    kernel = _median_kernel()
+    if kernel is None:
+        from scipy.ndimage import median_filter
+        return median_filter(x, size=(size, 1) if axis == 0 else (1, size), mode='reflect')
+    if axis == 0:
+        return kernel(np.ascontiguousarray(x.T), size).T
+    return kernel(np.ascontiguousarray(x), size)
+
+
+@lru_cache(maxsize=64)
+def _compute_musicality(file_path: str, mtime: float, size: int) -> bool:
+    """
+    Вердикт _is_instrumental_music для конкретной версии файла. mtime и size входят
+    в ключ кэша, поэтому повторные проверки того же файла (при транскрипции
+    и классификации) не декодируют аудио и не считают признаки заново.
+    """
+    try:
+        import librosa
+        import numpy as np
+        y, sr = librosa.load(
+            file_path, sr=MUSIC_ANALYSIS_SR, mono=True, duration=MUSIC_ANALYSIS_MAX_SECONDS
+        )
+        if y is None or len(y) == 0:
+            return False
+
+        # Одна STFT на все признаки: HPSS, онсеты, плоскостность и хрома
+        S_mag = np.abs(librosa.stft(y, n_fft=2048, hop_length=512))
+        S_power = S_mag ** 2
+
+        # HPSS: доля гармонической энергии. Медианные фильтры по времени/частоте и мягкие
+        # маски (как librosa.decompose.hpss), но без сборки комплексных H и P — нужны только суммы модулей
+        harm = _median_filter_1d(S_mag, 31, axis=1) ** 2
+        perc = _median_filter_1d(S_mag, 31, axis=0) ** 2
+        mask_sum = harm + perc
+        mask_sum[mask_sum == 0] = np.inf
+        harm_energy = float(np.sum(S_mag * harm / mask_sum))
+        perc_energy = float(np.sum(S_mag * perc / mask_sum))
+        total_energy = harm_energy + perc_energy + 1e-9
+        harmonic_ratio = harm_energy / total_energy
+
+        # Онсет-энергия (мел-спектр из той же STFT, параметры как у onset_strength(y=...))
+        mel_db = librosa.power_to_db(librosa.feature.melspectrogram(S=S_power, sr=sr))
+        onset_env = librosa.onset.onset_strength(S=mel_db, sr=sr)
+        onset_mean = float(np.mean(onset_env))
+
+        # Регулярность пульса: пик нормированной автокорреляции онсетов на лагах от
+        # MUSIC_PULSE_MIN_LAG кадров (меньшие лаги отражают лишь сглаженность огибающей).
+        # beat_track здесь не годится: он находит «темп» и в белом шуме
+        pulse = 0.0
+        if onset_env.size > 2 * MUSIC_PULSE_MIN_LAG:
+            env = (onset_env - onset_env.mean()) / (onset_env.std() + 1e-9)
+            corr = librosa.autocorrelate(env, max_size=MUSIC_PULSE_MAX_LAG)
+            pulse = float(np.max(corr[MUSIC_PULSE_MIN_LAG:]) / (corr[0] + 1e-9))
+
+        # Хрома: у музыки (и речи) звуковысотный профиль меняется, у шума он почти ровный
+        chroma = librosa.feature.chroma_stft(S=S_mag, sr=sr)
+        chroma_var = float(np.mean(np.var(chroma, axis=1)))
+
+        # Пороги откалиброваны на examples/ и синтетическом шуме: песни и рингтоны проходят,
+        # речь (нерегулярный пульс), шум и гул двигателя — нет. Нужны все признаки сразу
+        rhythmic = pulse >= MUSIC_MIN_PULSE
+        onset_active = onset_mean >= MUSIC_MIN_ONSET_MEAN
+        tonal = chroma_var >= MUSIC_MIN_CHROMA_VAR and harmonic_ratio >= MUSIC_MIN_HARMONIC_RATIO
+        return rhythmic and onset_active and tonal
+    except Exception:
+        return False
+
+
+@lru_cache(maxsize=64)
+def _compute_silence(file_path: str, mtime: float, size: int) -> bool:
+    """
+    Вердикт _is_silent_audio для конкретной версии файла (ключ кэша как у _compute_musicality).
+    Кадр считается тихим по RMS, а также если он негромкий и его спектр близок к белому шуму.
+    """
+    try:
+        import librosa
+        import numpy as np
+        y, sr = librosa.load(file_path, sr=SILENCE_ANALYSIS_SR, mono=True)
+        frame = int(sr * SILENCE_FRAME_MS / 1000)
+        if y is None or len(y) < frame:
+            return False
+
+        frames = librosa.util.frame(y, frame_length=frame, hop_length=frame)
+        rms_db = 20.0 * np.log10(np.sqrt(np.mean(frames ** 2, axis=0)) + 1e-12)
+
+        # Нормированная спектральная энтропия кадров: ~1 для шума, заметно ниже для речи/музыки
+        power = np.abs(np.fft.rfft(frames * np.hanning(frame)[:, None], axis=0)) ** 2
+        power /= power.sum(axis=0, keepdims=True) + 1e-12
+        entropy = -np.sum(power * np.log(power + 1e-12), axis=0) / np.log(power.shape[0])
+
+        silent = (rms_db < SILENCE_RMS_DBFS) | ((rms_db < SILENCE_HISS_DBFS) & (entropy > SILENCE_ENTROPY_MIN))
+        return float(np.mean(silent)) > SILENCE_MIN_RATIO
+    except Exception:
+        return False
+
+
+class _RateLimiter:
+    """
+    Проактивный ограничитель частоты запросов (token bucket): не более rate
+    запросов за period секунд. Поток, не получивший токен, ждёт ровно до его
+    появления — пул не упирается в 429 и не тратит время на слепой backoff.
+    Токены резервируются под замком, поэтому ожидающие обслуживаются по порядку.
+    """
+
+    def __init__(self, rate: int, period: float = 60.0) -> None:
+        self._capacity = float(rate)
+        self._tokens = float(rate)
+        self._fill_rate = rate / period
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Резервирует токен и возвращает, сколько секунд ждать до его появления."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._fill_rate)
+            self._updated = now
+            self._tokens -= 1.0
+            return 0.0 if self._tokens >= 0 else -self._tokens / self._fill_rate
+
+    def acquire(self) -> None:
+        """Ожидает разрешения на запрос (синхронные вызовы API)."""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """Ожидает разрешения на запрос, не блокируя цикл событий."""
+        import asyncio
+
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
 class AudioAnalyzer:
     """
     Анализатор аудиофайлов с использованием OpenAI API.
@@ -258,7 +748,7 @@ class AudioAnalyzer:
             'jobs': DEMUCS_JOBS,
         }
     
-    def __init__(self, primary_language: str = DEFAULT_PRIMARY_LANGUAGE, secondary_language: str = DEFAULT_SECONDARY_LANGUAGE, enable_post_process: bool = DEFAULT_ENABLE_POST_PROCESS, enable_logging: bool = DEFAULT_ENABLE_LOGGING) -> None:
+    def __init__(self, primary_language: str = DEFAULT_PRIMARY_LANGUAGE, secondary_language: str = DEFAULT_SECONDARY_LANGUAGE, enable_post_process: bool = DEFAULT_ENABLE_POST_PROCESS, enable_logging: bool = DEFAULT_ENABLE_LOGGING, enable_result_cache: bool = DEFAULT_ENABLE_RESULT_CACHE, result_cache_ttl_days: Optional[float] = None) -> None:
         """
         Инициализация анализатора аудио.
         
@@ -267,20 +757,39 @@ class AudioAnalyzer:
             secondary_language: Альтернативный язык распознавания (по умолчанию: en)
             enable_post_process: Включить пост-обработку с LLM (по умолчанию: False)
             enable_logging: Включить логирование в файл (по умолчанию: True)
+            enable_result_cache: Использовать кэш результатов анализа (по умолчанию: True)
+            result_cache_ttl_days: Срок годности записей кэша в днях (None — бессрочно)
             
         Raises:
             ValueError: Если OPENAI_API_KEY не найден в переменных окружения
         """
+        _load_environment()
         self.api_key = os.getenv('OPENAI_API_KEY')
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY не найден в переменных окружения")
         
-        openai.api_key = self.api_key
+        self._client_instance = None  # клиент OpenAI, создаётся при первом запросе к API (см. _client)
+        rpm = int(os.getenv('OPENAI_RPM') or DEFAULT_OPENAI_RPM)
+        self._rate_limiter = _RateLimiter(rpm) if rpm > 0 else None  # общий для всех потоков и запросов
+        self._client_lock = threading.Lock()
         self.primary_language = primary_language
         self.secondary_language = secondary_language
         self.enable_post_process = enable_post_process
         self.enable_logging = enable_logging
+        self.enable_result_cache = enable_result_cache
+        self.result_cache_ttl_days = result_cache_ttl_days
         self._region_error_notified = False  # чтобы не дублировать сообщения об ограничении региона
+        self._state_lock = threading.Lock()  # защищает общие флаги при параллельной обработке файлов
+        self._demucs_model = None  # (модель, устройство) Demucs, загружается при первом использовании
+        self._demucs_autocast = None  # (устройство, dtype) autocast для Demucs, определяется при загрузке модели
+        self._vad = None  # (модель, get_speech_timestamps) Silero VAD; False — VAD недоступен
+        self._vad_lock = threading.Lock()  # модель VAD хранит состояние между кадрами, вызовы последовательны
+        # Локальные признаки аудио, считаемые параллельно с запросами к API (см. OVERLAP_MUSIC_ANALYSIS);
+        # потоки создаются при первой задаче
+        self._feature_pool = ThreadPoolExecutor(max_workers=API_MAX_WORKERS, thread_name_prefix="features")
+        self._warmup_started = False  # фоновый прогрев моделей запускается один раз за сеанс (см. _start_warmup)
+        self._enhanced_files: Dict[str, str] = {}  # путь → вокал, заранее выделенный _demucs_batch
+        self._file_sizes: Dict[Path, int] = {}  # путь → размер в байтах, заполняется list_audio_files
         
         # Настройка логирования (если включено)
         if self.enable_logging:
@@ -290,7 +799,50 @@ class AudioAnalyzer:
             logging.getLogger().setLevel(logging.CRITICAL)
             self.logger = logging.getLogger(__name__)
             self.logger.setLevel(logging.CRITICAL)
+        
+        # Кэш ИИ-классификации: хэш транскрипции → категория, сохраняется на диск при выходе
+        self._classify_cache: Dict[str, str] = self._load_classify_cache()
+        self._classify_cache_dirty = False
+        atexit.register(self._save_classify_cache)
+    
+    @property
+    def _client(self):
+        """
+        Клиент OpenAI, создаваемый при первом обращении: запуски, которые
+        завершаются до запросов к API (всё из кэша, тишина), не импортируют SDK.
+        """
+        client = self._client_instance
+        if client is None:
+            with self._client_lock:
+                client = self._client_instance
+                if client is None:
+                    client = self._client_instance = self._create_openai_client()
+        return client
+    
+    def _throttle(self) -> None:
+        """
+        Ожидает разрешения ограничителя частоты перед синхронным запросом к API.
+        """
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire()
     
+    def _create_openai_client(self):
+        """
+        Создаёт один клиент OpenAI на весь сеанс: транскрипция, пост-обработка и
+        классификация переиспользуют общий пул соединений (TCP/TLS), а при наличии
+        пакета h2 — и мультиплексирование HTTP/2.
+        
+        Returns:
+            Экземпляр openai.OpenAI
+        """
+        openai_module = _import_openai()
+        try:
+            http_client = openai_module.DefaultHttpxClient(http2=True)
+        except ImportError:
+            # HTTP/2 требует пакет h2 — без него используем HTTP/1.1 с тем же пулом
+            http_client = None
+        return openai_module.OpenAI(api_key=self.api_key, http_client=http_client)
+
     def _setup_logging(self) -> None:
         """
         Настраивает логирование для отладки.
@@ -322,25 +874,35 @@ class AudioAnalyzer:
         Не меняет смысл, лишь расставляет границы предложений и устойчивые выражения.
         """
         try:
-            import re
-            s = text.strip()
-            # Устойчивое выражение
-            s = re.sub(r"\bне\s+говори\s+мне\b", "не говори нет", s, flags=re.IGNORECASE)
-            # Разделяем длинные фразы по характерным кускам
-            s = re.sub(r",\s*(ч[ёе]\s+ты\s+гонишь)", r". \1", s, flags=re.IGNORECASE)
-            s = re.sub(r",\s*(снова\s+мозг\s+мне\s+выносишь)", r". \1", s, flags=re.IGNORECASE)
-            # Вопросительная интонация
-            s = re.sub(r"\b(ч[ёе]\s+ты\s+гонишь)\.?", r"\1?", s, flags=re.IGNORECASE)
-            # Точка после повелительного в начале
-            s = re.sub(r"^(Позвони\s+мне)(,|$)", r"\1.", s, flags=re.IGNORECASE)
-            # Свести множественные пробелы
-            s = re.sub(r"\s+", " ", s)
-            # Нормализуем пробелы перед пунктуацией
-            s = re.sub(r"\s+([,.!?])", r"\1", s)
+            s = _PUNCT_RULES.sub(_punct_rule_replacement, text.strip())
+            s = _MULTISPACE.sub(" ", s)
+            s = _SPACE_BEFORE_PUNCT.sub(r"\1", s)
             return s.strip()
         except Exception:
             return text
 
+    def _post_process_messages(self, text: str) -> List[Dict[str, str]]:
+        """
+        Формирует сообщения для LLM-коррекции транскрипции.
+        """
+        return [
+            {"role": "system", "content": POST_PROCESS_PROMPT},
+            {"role": "user", "content": f"Исправь ошибки в транскрипции песни:\n\n{text}"}
+        ]
+
+    def _finish_post_process(self, response) -> str:
+        """
+        Извлекает исправленный текст из ответа LLM и доводит пунктуацию.
+        """
+        corrected_text = response.choices[0].message.content.strip()
+        self.logger.debug(f"ПОСТ-ОБРАБОТКА: Исправленный текст: '{corrected_text}'")
+
+        # Лёгкая доводка пунктуации/идиом для русского
+        if self.primary_language == "ru":
+            corrected_text = self._polish_punctuation_ru(corrected_text)
+
+        return corrected_text
+
     def _post_process_transcription(self, text: str, debug: bool = False) -> str:
         """
         Пост-обработка транскрипции с помощью LLM для коррекции ошибок.
@@ -358,30 +920,58 @@ class AudioAnalyzer:
         self.logger.debug(f"ПОСТ-ОБРАБОТКА: Исходный текст: '{text}'")
         
         try:
-            system_prompt = POST_PROCESS_PROMPT
-
-            response = openai.chat.completions.create(
+            self._throttle()
+            response = self._client.chat.completions.create(
                 model=LLM_MODEL,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"Исправь ошибки в транскрипции песни:\n\n{text}"}
-                ],
+                messages=self._post_process_messages(text),
                 max_tokens=LLM_MAX_TOKENS,
                 temperature=LLM_TEMPERATURE
             )
-            
-            corrected_text = response.choices[0].message.content.strip()
-            self.logger.debug(f"ПОСТ-ОБРАБОТКА: Исправленный текст: '{corrected_text}'")
-            
-            # Лёгкая доводка пунктуации/идиом для русского
-            if self.primary_language == "ru":
-                corrected_text = self._polish_punctuation_ru(corrected_text)
-            
-            return corrected_text
+            return self._finish_post_process(response)
             
         except Exception as e:
+            self._note_api_error()
             self.logger.warning(f"ПОСТ-ОБРАБОТКА: Ошибка коррекции: {e}")
             return text
+
+    async def _post_process_batch(self, texts: List[str]) -> List[Tuple[str, bool]]:
+        """
+        Пакетная пост-обработка транскрипций: запросы к LLM выполняются конкурентно,
+        поэтому время этапа определяется самым долгим запросом, а не их суммой.
+        
+        Args:
+            texts: Исходные тексты транскрипций
+            
+        Returns:
+            Пары (исправленный текст, была ли ошибка API) в том же порядке;
+            при ошибке возвращается исходный текст
+        """
+        import asyncio
+
+        semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENT_REQUESTS)
+
+        async with _import_openai().AsyncOpenAI(api_key=self.api_key) as client:
+            async def correct(text: str) -> Tuple[str, bool]:
+                if not text or len(text.strip()) < MIN_TEXT_LENGTH_FOR_POST_PROCESS:
+                    return text, False
+                self.logger.debug(f"ПОСТ-ОБРАБОТКА: Исходный текст: '{text}'")
+                try:
+                    async with semaphore:
+                        if self._rate_limiter is not None:
+                            await self._rate_limiter.acquire_async()
+                        response = await client.chat.completions.create(
+                            model=LLM_MODEL,
+                            messages=self._post_process_messages(text),
+                            max_tokens=LLM_MAX_TOKENS,
+                            temperature=LLM_TEMPERATURE
+                        )
+                    return self._finish_post_process(response), False
+                except Exception as e:
+                    self._note_api_error()
+                    self.logger.warning(f"ПОСТ-ОБРАБОТКА: Ошибка коррекции: {e}")
+                    return text, True
+
+            return list(await asyncio.gather(*(correct(text) for text in texts)))
     
     def _enhance_audio_for_transcription(self, file_path: str) -> str:
         """
@@ -399,100 +989,23 @@ class AudioAnalyzer:
         if not ENABLE_AUDIO_ENHANCEMENT:
             self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Отключено для ускорения работы")
             return file_path
-        
-        # Предобработка 1: лёгкая очистка входного сигнала для лучшей сегрегации (не меняем исходный файл)
-        preclean_file = self._preclean_for_demucs(file_path)
 
+        # Вокал уже выделен пакетным прогоном Demucs (_demucs_batch)
+        prepared = self._enhanced_files.pop(file_path, None)
+        if prepared and os.path.exists(prepared):
+            self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Используем вокал из пакетного прогона: {prepared}")
+            return prepared
+        
         # Получаем параметры Demucs из блока настроек
         demucs_params = self._get_demucs_params()
         self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Параметры Demucs: {demucs_params}")
-        self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Попытка улучшения файла (после предочистки): {preclean_file}")
+        self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Попытка улучшения файла: {file_path}")
             
         try:
             # Пытаемся использовать Demucs для качественного разделения вокала
             try:
-                self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Импортируем Demucs...")
-                from demucs import separate
-                import torch
-                import tempfile
-                import os
-                from pathlib import Path
-                
-                self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Demucs успешно импортирован")
-                self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Используем Demucs для разделения вокала: {file_path}")
-                
-                # Создаем временную папку для результатов Demucs
-                temp_dir = Path(tempfile.mkdtemp())
-                
-                # Используем Demucs для разделения аудио с параметрами качества
-                # Разделяем на: vocals, drums, bass, other
-                separate.main([
-                    str(preclean_file),
-                    "--out", str(temp_dir),
-                    "-n", demucs_params['model'],
-                    "-d", (DEMUCS_DEVICE if DEMUCS_DEVICE in ("cpu", "cuda") else ("cuda" if torch.cuda.is_available() else "cpu")),
-                    "--shifts", str(demucs_params['shifts']),
-                    "--overlap", str(demucs_params['overlap']),
-                    "--two-stems", DEMUCS_TWO_STEMS,
-                    "--float32",
-                    "-j", str(demucs_params['jobs'])
-                ])
-                
-                # Ищем файл с вокалом
-                # Demucs создает структуру: temp_dir/model_name/track_name/vocals.{wav|mp3}
-                model_name = demucs_params['model']
-                track_name = Path(file_path).stem
-                vocals_file_wav = temp_dir / model_name / track_name / "vocals.wav"
-                vocals_file_mp3 = temp_dir / model_name / track_name / "vocals.mp3"
-                vocals_file = vocals_file_wav if vocals_file_wav.exists() else vocals_file_mp3
-                # Если по ожидаемому пути нет, ищем глубоко любой vocals.*
-                if not vocals_file.exists():
-                    import glob
-                    candidates = glob.glob(str(temp_dir / "**" / "vocals.*"), recursive=True)
-                    if candidates:
-                        vocals_file = Path(candidates[0])
-                
-                if vocals_file.exists():
-                    # Создаем финальный файл с вокалом рядом с исходным: {name}_vocals.{ext}
-                    orig_path = Path(file_path)
-                    # Сохраняем "как есть" без принудительной конвертации
-                    final_vocals_path = orig_path.with_name(f"{orig_path.stem}_vocals{vocals_file.suffix}")
-                    final_vocals_file = str(final_vocals_path)
-                    import shutil
-                    # Перезаписываем, если файл уже существует
-                    try:
-                        dest_path = Path(final_vocals_file)
-                        if dest_path.exists():
-                            dest_path.unlink()
-                    except Exception:
-                        pass
-                    try:
-                        shutil.move(str(vocals_file), final_vocals_file)
-                    except Exception:
-                        shutil.copy2(vocals_file, final_vocals_file)
-
-                    # Двухшаговая доочистка вокала: вычитание no_vocals и лёгкий EQ
-                    try:
-                        self._refine_vocals_with_background(final_vocals_file, temp_dir, model_name, track_name)
-                    except Exception:
-                        pass
-
-                    # Дополнительная очистка вокала от остаточного аккомпанемента (без смены формата)
-                    try:
-                        self._cleanup_vocals_file(final_vocals_file)
-                    except Exception:
-                        pass
-                    
-                    # Очищаем временную папку
-                    shutil.rmtree(temp_dir)
-                    
-                    self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Создан файл с выделенным вокалом: {final_vocals_file}")
-                    return final_vocals_file
-                else:
-                    self.logger.warning(f"УЛУЧШЕНИЕ АУДИО: Файл с вокалом не найден: {vocals_file}")
-                    # Очищаем временную папку
-                    shutil.rmtree(temp_dir)
-                    return file_path
+                vocals, no_vocals, demucs_sr = self._separate_with_demucs(file_path, demucs_params)
+                return self._finish_vocals(file_path, vocals, no_vocals, demucs_sr)
                 
             except ImportError as e:
                 self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Demucs недоступен: {e}")
@@ -510,34 +1023,302 @@ class AudioAnalyzer:
             self.logger.warning(f"УЛУЧШЕНИЕ АУДИО: Общая ошибка обработки: {e}")
             return file_path
 
-    def _preclean_for_demucs(self, file_path: str) -> str:
+    def _finish_vocals(self, file_path: str, vocals, no_vocals, sr: int) -> str:
+        """
+        Доочищает вокал Demucs в памяти и один раз сохраняет его как
+        {name}_vocals.wav рядом с исходным (см. _write_vocals).
+        
+        Returns:
+            Путь к финальному файлу с вокалом
+        """
+        y = vocals
+
+        # Доочистка вокала одним проходом: вычитание no_vocals и лёгкий EQ;
+        # при ошибке — только EQ от остаточного аккомпанемента
+        try:
+            y = self._refine_vocals_with_background(y, no_vocals, sr)
+        except Exception as e:
+            self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Вычитание фона пропущено: {e}")
+            try:
+                y = self._cleanup_vocals(y, sr)
+            except Exception as e:
+                self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Доочистка вокала пропущена: {e}")
+
+        return self._write_vocals(file_path, y, sr)
+
+    def _write_vocals(self, file_path: str, y, sr: int) -> str:
+        """
+        Сохраняет выделенный вокал как {name}_vocals.wav рядом с исходным: моно,
+        VOCALS_SAMPLE_RATE, VOCALS_SUBTYPE. Этот же файл загружается в API, поэтому
+        он не больше, чем нужно для распознавания (float32 44.1 кГц в ~5 раз крупнее).
+        
+        Returns:
+            Путь к файлу с вокалом
+        """
+        import librosa
+        import numpy as np
+        import soundfile as sf
+
+        if sr != VOCALS_SAMPLE_RATE:
+            y = librosa.resample(y, orig_sr=sr, target_sr=VOCALS_SAMPLE_RATE)
+        orig_path = Path(file_path)
+        final_vocals_file = str(orig_path.with_name(f"{orig_path.stem}_vocals.wav"))
+        sf.write(final_vocals_file, np.clip(y, -1.0, 1.0), VOCALS_SAMPLE_RATE, subtype=VOCALS_SUBTYPE)
+
+        self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Создан файл с выделенным вокалом: {final_vocals_file}")
+        return final_vocals_file
+
+    def _get_demucs_model(self, model_name: str):
         """
-        Предочистка исходного файла для лучшего разделения Demucs: HPF ~120 Гц и мягкий high-shelf >10 кГц.
-        Возвращает путь к временно сохранённому WAV с предобработкой.
+        Загружает модель Demucs один раз и переиспользует её для всех файлов
+        (без повторного импорта torch, чтения весов и инициализации CUDA на каждый трек).
+        
+        Returns:
+            Кортеж (модель, устройство)
+        """
+        if self._demucs_model is None:
+            import torch
+            from demucs.pretrained import get_model
+
+            device = "cuda" if DEMUCS_DEVICE != "cpu" and torch.cuda.is_available() else "cpu"
+            precision = self._resolve_demucs_precision(device)
+            if device == "cuda":
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
+            self._demucs_autocast = {
+                "fp16": (device, torch.float16),
+                "bf16": (device, torch.bfloat16),
+            }.get(precision)
+            self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Загружаем модель Demucs {model_name} на {device} (точность: {precision})")
+            with suppress_external_noise():
+                model = get_model(model_name)
+            model.eval()
+            if precision == "int8":
+                # Веса линейных слоёв и LSTM хранятся в int8, активации квантуются на лету
+                model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8)
+            self._demucs_model = (model, device)
+        return self._demucs_model
+
+    def _resolve_demucs_precision(self, device: str) -> str:
+        """
+        Выбирает точность вычислений Demucs по DEMUCS_PRECISION и возможностям устройства:
+        FP16 — только на CUDA с compute capability >= 7.0, BF16 — где его поддерживает
+        устройство, int8 — только на CPU. Неподдерживаемый вариант заменяется на FP32.
+        
+        Returns:
+            Одно из "fp32", "fp16", "bf16", "int8"
+        """
+        import torch
+
+        precision = DEMUCS_PRECISION
+        if precision == "auto":
+            precision = "fp16" if device == "cuda" else "fp32"
+        if device == "cuda":
+            supported = {"fp32"}
+            if torch.cuda.get_device_capability() >= (7, 0):
+                supported.add("fp16")
+            if torch.cuda.is_bf16_supported():
+                supported.add("bf16")
+        else:
+            supported = {"fp32", "bf16", "int8"}
+        if precision not in supported:
+            self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Точность {precision} недоступна на {device}, используется fp32")
+            precision = "fp32"
+        return precision
+
+    def _to_demucs_input(self, y, sr: int, model):
+        """
+        Приводит моно-сигнал к формату входа модели Demucs: тензор [каналы, сэмплы]
+        с частотой дискретизации модели.
+        """
+        import torch
+        from demucs.audio import convert_audio
+
+        return convert_audio(torch.from_numpy(y)[None], sr, model.samplerate, model.audio_channels)
+
+    def _run_demucs(self, wavs: list, demucs_params: dict) -> list:
+        """
+        Прогоняет один или несколько треков через Demucs одним вызовом apply_model:
+        треки нормализуются по отдельности, дополняются нулями до общей длины
+        и складываются в батч [B, каналы, сэмплы].
+        
+        Returns:
+            Список пар моно-сигналов (vocals, no_vocals) в порядке входа, обрезанных до исходной длины
         """
+        import torch
+        from demucs.apply import apply_model
+
+        model, device = self._get_demucs_model(demucs_params['model'])
+
+        lengths = [wav.shape[-1] for wav in wavs]
+        refs = [wav.mean(0) for wav in wavs]
+        # Батч создаётся сразу на устройстве модели: apply_model возвращает результат
+        # на устройстве входа, и последующая сборка стемов тоже идёт на GPU
+        batch = torch.zeros(len(wavs), model.audio_channels, max(lengths), device=device)
+        for i, (wav, ref) in enumerate(zip(wavs, refs)):
+            # Нормализация как в demucs.separate
+            batch[i, :, :lengths[i]] = ((wav - ref.mean()) / ref.std()).to(device)
+
+        # Autocast FP16/BF16 (см. DEMUCS_PRECISION); результат возвращается в float32
+        precision = torch.autocast(self._demucs_autocast[0], dtype=self._demucs_autocast[1]) if self._demucs_autocast else nullcontext()
+        with suppress_external_noise(), torch.no_grad(), precision:
+            sources = apply_model(
+                model, batch,
+                device=device,
+                shifts=demucs_params['shifts'],
+                split=True,
+                overlap=demucs_params['overlap'],
+                num_workers=demucs_params['jobs'],
+            ).float()
+
+        # Денормализация, сборка no_vocals и сведение в моно — на устройстве модели;
+        # на CPU копируются только два моно-сигнала на трек вместо всех стемов
+        stem_index = model.sources.index(DEMUCS_TWO_STEMS)
+        stems = []
+        for i, (length, ref) in enumerate(zip(lengths, refs)):
+            track_sources = sources[i, :, :, :length] * ref.std().item() + ref.mean().item()
+            vocals = track_sources[stem_index]
+            no_vocals = track_sources.sum(0) - vocals
+            stems.append((vocals.mean(0).cpu().numpy(), no_vocals.mean(0).cpu().numpy()))
+        return stems
+
+    def _separate_with_demucs(self, file_path: str, demucs_params: dict) -> tuple:
+        """
+        Разделяет трек на вокал и аккомпанемент моделью Demucs прямо в памяти
+        (аналог `--two-stems vocals` CLI без промежуточных файлов).
+        
+        Returns:
+            Кортеж (vocals, no_vocals, частота дискретизации); стемы — моно numpy-массивы
+        """
+        model, _ = self._get_demucs_model(demucs_params['model'])
+        self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Используем Demucs для разделения вокала: {file_path}")
+        # Предобработка: лёгкая очистка входного сигнала для лучшей сегрегации (в памяти, исходный файл не меняется)
+        y, sr = self._preclean_for_demucs(file_path)
+        vocals, no_vocals = self._run_demucs([self._to_demucs_input(y, sr, model)], demucs_params)[0]
+        return vocals, no_vocals, model.samplerate
+
+    def _plan_demucs_groups(self, paths: List[str]) -> List[List[int]]:
+        """
+        Планирует порядок выделения вокала: на GPU треки группируются по длительности
+        (до DEMUCS_BATCH_SIZE в группе), чтобы минимизировать дополнение нулями
+        в пакетных прогонах; иначе каждый трек обрабатывается отдельно.
+        
+        Args:
+            paths: Пути к (сконвертированным) аудиофайлам
+            
+        Returns:
+            Группы индексов в paths в порядке обработки
+        """
+        single = [[i] for i in range(len(paths))]
+        if not ENABLE_AUDIO_ENHANCEMENT or len(paths) < 2:
+            return single
+
         try:
             import librosa
-            import soundfile as sf
-            import numpy as np
-            p = Path(file_path)
-            y, sr = librosa.load(str(p), sr=None, mono=True)
-            if y is None or len(y) == 0:
-                return file_path
-            # HPF
-            sos = librosa.iirfilter(2, 120.0, btype='highpass', ftype='butter', fs=sr, output='sos')
-            y = librosa.sosfilt(sos, y)
-            # лёгкий high-shelf >10 кГц
-            S = librosa.stft(y)
-            freqs = librosa.fft_frequencies(sr=sr)
-            shelf = np.ones_like(freqs)
-            shelf[freqs >= 10000] = 10 ** (-2/20)  # -2 дБ
-            y = librosa.istft(S * shelf[:, None])
-            # временный файл рядом с исходным
-            tmp = p.with_name(f"{p.stem}_preclean.wav")
-            sf.write(str(tmp), y, sr)
-            return str(tmp)
+            _, device = self._get_demucs_model(DEMUCS_MODEL)
+        except Exception as e:
+            self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Пакетный Demucs недоступен: {e}")
+            return single
+        if device != "cuda":
+            # На CPU батч не ускоряет разделение, а дополнение нулями только добавляет работы
+            return single
+
+        try:
+            by_duration = sorted(range(len(paths)), key=lambda i: librosa.get_duration(path=paths[i]))
+        except Exception as e:
+            self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Не удалось определить длительности для пакетного Demucs: {e}")
+            return single
+        return [by_duration[start:start + DEMUCS_BATCH_SIZE] for start in range(0, len(by_duration), DEMUCS_BATCH_SIZE)]
+
+    def _demucs_batch(self, paths: List[str]) -> None:
+        """
+        Заранее выделяет вокал для группы треков одним пакетным прогоном Demucs.
+        Результаты запоминаются и затем используются _enhance_audio_for_transcription;
+        при ошибке треки обрабатываются обычным путём по одному.
+        
+        Args:
+            paths: Пути к (сконвертированным) аудиофайлам одной группы
+        """
+        if not ENABLE_AUDIO_ENHANCEMENT or len(paths) < 2:
+            return
+
+        demucs_params = self._get_demucs_params()
+        self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Пакетный прогон Demucs для {len(paths)} файлов")
+        try:
+            model, _ = self._get_demucs_model(demucs_params['model'])
+            wavs = [self._to_demucs_input(*self._preclean_for_demucs(path), model) for path in paths]
+            stems = self._run_demucs(wavs, demucs_params)
+            for path, (vocals, no_vocals) in zip(paths, stems):
+                self._enhanced_files[path] = self._finish_vocals(path, vocals, no_vocals, model.samplerate)
+        except Exception as e:
+            self.logger.warning(f"УЛУЧШЕНИЕ АУДИО: Ошибка пакетного прогона Demucs: {e}")
+
+    def _apply_eq_chain(self, y, sr: int, shelf_db: float, hpf_passes: int = 1, background=None, bg_weight: float = 0.0):
+        """
+        Единая EQ-цепочка: (вычитание фона) → HPF → high-shelf.
+        HPF и shelf — каскад биквадов, применяемый одним проходом sosfilt
+        во временной области без STFT/ISTFT; коэффициенты берутся из кэша по sr.
+        
+        Args:
+            y: Моно-сигнал
+            sr: Частота дискретизации
+            shelf_db: Усиление high-shelf выше EQ_SHELF_HZ, дБ
+            hpf_passes: Сколько раз подряд применить HPF
+            background: Фоновый сигнал для мягкого вычитания (той же частоты)
+            bg_weight: Вес вычитаемого фона
+            
+        Returns:
+            Обработанный сигнал той же длины (или общей длины с фоном)
+        """
+        import numpy as np
+        from scipy.signal import sosfilt
+
+        y = np.asarray(y, dtype=np.float32)
+        if background is not None:
+            # Подгон по длине и мягкое вычитание
+            m = min(len(y), len(background))
+            y = y[:m] - np.float32(bg_weight) * background[:m]
+
+        sos = _eq_sos(sr, EQ_HPF_HZ, hpf_passes, EQ_SHELF_HZ, shelf_db)
+        return sosfilt(sos, y).astype(np.float32, copy=False)
+
+    def _fast_load(self, path: str) -> tuple:
+        """
+        Загружает аудио как моно float32 с исходной частотой дискретизации.
+        Напрямую читает через soundfile (WAV/FLAC, а с libsndfile >= 1.1 и MP3) без
+        обёрток librosa, декодируя из отображённого в память файла (см. _mapped_file);
+        неподдерживаемые форматы (например, M4A) — через librosa.load.
+        
+        Returns:
+            Кортеж (сигнал, частота дискретизации)
+        """
+        import numpy as np
+        import soundfile as sf
+        try:
+            with _mapped_file(path) as mapped:
+                y, sr = sf.read(mapped if mapped is not None else path, dtype='float32', always_2d=False)
         except Exception:
-            return file_path
+            import librosa
+            return librosa.load(path, sr=None, mono=True)
+        if y.ndim > 1:
+            y = y.mean(axis=1, dtype=np.float32)
+        return y, sr
+
+    def _preclean_for_demucs(self, file_path: str) -> tuple:
+        """
+        Предочистка входа для лучшего разделения Demucs: HPF ~120 Гц и мягкий high-shelf >10 кГц.
+        При ошибке EQ возвращается исходный сигнал.
+        
+        Returns:
+            Кортеж (моно-сигнал, частота дискретизации)
+        """
+        y, sr = self._fast_load(file_path)
+        try:
+            if len(y):
+                y = self._apply_eq_chain(y, sr, shelf_db=EQ_PRECLEAN_SHELF_DB)
+        except Exception as e:
+            self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Предочистка пропущена: {e}")
+        return y, sr
     
     def _enhance_with_librosa(self, file_path: str) -> str:
         """
@@ -551,47 +1332,26 @@ class AudioAnalyzer:
         """
         try:
             import librosa
-            import soundfile as sf
-            import numpy as np
-            from pathlib import Path
             
             self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Используем librosa для выделения вокала: {file_path}")
             
             # Загружаем аудио
-            y, sr = librosa.load(file_path, sr=None, mono=True)
+            y, sr = self._fast_load(file_path)
             
             # Простое выделение вокала с помощью спектрального вычитания
             # Вычисляем спектрограмму
             stft = librosa.stft(y)
-            magnitude = np.abs(stft)
-            phase = np.angle(stft)
-            
-            # Создаем маску для вокала (частоты примерно 80-8000 Гц)
-            freqs = librosa.fft_frequencies(sr=sr)
-            vocal_mask = np.zeros_like(magnitude)
             
-            # Усиливаем частоты вокального диапазона
-            for i, freq in enumerate(freqs):
-                if VOCAL_FREQ_MIN <= freq <= VOCAL_FREQ_MAX:  # Вокальный диапазон
-                    vocal_mask[i, :] = VOCAL_MASK_FULL
-                elif VOCAL_FREQ_PARTIAL_MIN < freq <= VOCAL_FREQ_PARTIAL_MAX:  # Частично вокальный диапазон
-                    vocal_mask[i, :] = VOCAL_MASK_PARTIAL
-            
-            # Применяем маску
-            enhanced_magnitude = magnitude * vocal_mask
+            # Применяем маску вокального диапазона на месте (столбец усилений из кэша по sr
+            # транслируется по кадрам). Маска вещественная и неотрицательная, поэтому фаза
+            # сохраняется без разложения на модуль/фазу и обратной сборки через exp
+            stft *= _vocal_band_gains(sr)
             
             # Восстанавливаем аудио
-            enhanced_stft = enhanced_magnitude * np.exp(1j * phase)
-            enhanced_y = librosa.istft(enhanced_stft)
+            enhanced_y = librosa.istft(stft)
             
-            # Создаем временный файл
             # Сохраняем строго как {stem}_vocals.wav рядом с исходником
-            p = Path(file_path)
-            temp_file = str(p.with_name(f"{p.stem}_vocals.wav"))
-            sf.write(temp_file, enhanced_y, sr)
-            
-            self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Создан файл с выделенным вокалом: {temp_file}")
-            return temp_file
+            return self._write_vocals(file_path, enhanced_y, sr)
             
         except ImportError as e:
             self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: librosa недоступна: {e}")
@@ -600,71 +1360,36 @@ class AudioAnalyzer:
             self.logger.warning(f"УЛУЧШЕНИЕ АУДИО: Ошибка обработки с librosa: {e}")
             return file_path
 
-    def _cleanup_vocals_file(self, file_path: str) -> None:
+    def _cleanup_vocals(self, y, sr: int):
         """
         Лёгкая дополнительная очистка вокала от остаточного аккомпанемента:
         - подавление низких частот (< 120 Гц)
         - мягкий high-shelf на верхах, чтобы убрать шипение от перкуссии
-        Без изменения формата файла.
         """
-        try:
-            import librosa
-            import soundfile as sf
-            import numpy as np
-            y, sr = librosa.load(file_path, sr=None, mono=True)
-            if y is None or len(y) == 0:
-                return
-            # Высокочастотная фильтрация: HPF 2-го порядка ~120 Гц
-            sos = librosa.iirfilter(2, 120.0, rs=None, btype='highpass', ftype='butter', fs=sr, output='sos')
-            y = librosa.sosfilt(sos, y)
-            # Лёгкий high-shelf: ослабим диапазон > 10 кГц на -3 дБ эквивалентно (грубая аппроксимация через EQ в частотной области)
-            S = librosa.stft(y)
-            freqs = librosa.fft_frequencies(sr=sr)
-            shelf = np.ones_like(freqs)
-            shelf[freqs >= 10000] = 10 ** (-3/20)
-            y = librosa.istft(S * shelf[:, None])
-            sf.write(file_path, y, sr)
-        except Exception:
-            return
+        return self._apply_eq_chain(y, sr, shelf_db=EQ_CLEANUP_SHELF_DB)
 
-    def _refine_vocals_with_background(self, vocals_path: str, temp_dir: Path, model_name: str, track_name: str, bg_weight: float = 0.2) -> None:
+    def _refine_vocals_with_background(self, y_v, y_bg, sr: int, bg_weight: float = 0.2):
         """
         Уменьшает остатки аккомпанемента в вокале:
-        1) читает no_vocals из временного каталога Demucs
-        2) делает мягкое вычитание: vocals = vocals - bg_weight * no_vocals (подгон по длине)
-        3) применяет лёгкий EQ (тот же, что в _cleanup_vocals_file)
-        Результат перезаписывает в vocals_path (без смены формата/расширения).
+        1) мягкое вычитание: vocals = vocals - bg_weight * no_vocals (подгон по длине)
+        2) EQ доочистки (_cleanup_vocals) в той же цепочке: HPF дважды и суммарный high-shelf
+        
+        Args:
+            y_v: Моно-вокал
+            y_bg: Моно-аккомпанемент (no_vocals) той же частоты
+            sr: Частота дискретизации
+            bg_weight: Вес вычитаемого аккомпанемента
+            
+        Returns:
+            Доочищенный вокал
         """
-        try:
-            import soundfile as sf
-            import numpy as np
-            import librosa
-            # Путь к no_vocals
-            bg_wav = temp_dir / model_name / track_name / "no_vocals.wav"
-            bg_mp3 = temp_dir / model_name / track_name / "no_vocals.mp3"
-            bg_file = bg_wav if bg_wav.exists() else (bg_mp3 if bg_mp3.exists() else None)
-            if bg_file is None:
-                return
-            # Чтение
-            y_v, sr = librosa.load(vocals_path, sr=None, mono=True)
-            y_bg, sr_bg = librosa.load(str(bg_file), sr=sr, mono=True)
-            if len(y_bg) != len(y_v):
-                m = min(len(y_bg), len(y_v))
-                y_bg = y_bg[:m]
-                y_v = y_v[:m]
-            # Мягкое вычитание
-            y = y_v - float(bg_weight) * y_bg
-            # Лёгкая очистка (тот же фильтр, что в _cleanup_vocals_file)
-            sos = librosa.iirfilter(2, 120.0, btype='highpass', ftype='butter', fs=sr, output='sos')
-            y = librosa.sosfilt(sos, y)
-            S = librosa.stft(y)
-            freqs = librosa.fft_frequencies(sr=sr)
-            shelf = np.ones_like(freqs)
-            shelf[freqs >= 10000] = 10 ** (-2/20)
-            y = librosa.istft(S * shelf[:, None])
-            sf.write(vocals_path, y, sr)
-        except Exception:
-            return
+        return self._apply_eq_chain(
+            y_v, sr,
+            shelf_db=EQ_REFINE_SHELF_DB + EQ_CLEANUP_SHELF_DB,
+            hpf_passes=2,
+            background=y_bg,
+            bg_weight=bg_weight,
+        )
     
     def list_audio_files(self, folder: str) -> List[Path]:
         """
@@ -684,21 +1409,33 @@ class AudioAnalyzer:
             raise FileNotFoundError(f"Папка не найдена: {folder}")
         
         audio_files = []
-        for file_path in folder_path.iterdir():
-            if not file_path.is_file():
-                continue
-            if file_path.suffix.lower() not in SUPPORTED_AUDIO_FORMATS:
-                continue
-            # Исключаем сгенерированные стемы вокала из первичной обработки
-            # чтобы избежать зацикливания пайплайна: *_vocals.*
-            try:
-                if file_path.stem.lower().endswith("_vocals"):
+        # Один проход scandir: имя и тип берутся из записи каталога, stat — один раз на файл
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                stem, suffix = os.path.splitext(entry.name)
+                if suffix.lower() not in _SUPPORTED_AUDIO_SUFFIXES:
                     continue
-            except Exception:
-                pass
-            audio_files.append(file_path)
+                # Исключаем сгенерированные стемы вокала из первичной обработки
+                # чтобы избежать зацикливания пайплайна: *_vocals.*
+                if stem.lower().endswith("_vocals"):
+                    continue
+                if not entry.is_file():
+                    continue
+                file_path = Path(entry.path)
+                # Размер запоминаем, чтобы choose_file/анализ не делали повторный stat
+                self._file_sizes[file_path] = entry.stat().st_size
+                audio_files.append(file_path)
         
         return sorted(audio_files)
+
+    def _file_size_mb(self, file_path: Path) -> float:
+        """
+        Размер файла в МБ (из кэша list_audio_files, иначе через stat с сохранением в кэш).
+        """
+        size = self._file_sizes.get(file_path)
+        if size is None:
+            size = self._file_sizes[file_path] = file_path.stat().st_size
+        return size / (1024 * 1024)
     
     def choose_file(self, files: List[Path]) -> Optional[Path]:
         """
@@ -716,7 +1453,7 @@ class AudioAnalyzer:
         
         print(f"\n📁 Найденные аудиофайлы:")
         for i, file_path in enumerate(files, 1):
-            file_size = file_path.stat().st_size / (1024 * 1024)
+            file_size = self._file_size_mb(file_path)
             print(f"  {i}. {file_path.name} ({file_size:.1f} МБ)")
         
         print(f"  {len(files) + 1}. ❌ Отмена")
@@ -740,13 +1477,17 @@ class AudioAnalyzer:
     def convert_audio_format(self, file_path: Path) -> str:
         """
         Конвертирует аудиофайл в MP3 формат если необходимо.
+        Файлы в форматах, которые OpenAI API принимает напрямую, возвращаются как есть.
         
         Args:
             file_path: Путь к исходному файлу
             
         Returns:
-            Путь к конвертированному файлу или исходному если конвертация недоступна
+            Путь к конвертированному файлу или исходному если конвертация не нужна или недоступна
         """
+        if Path(file_path).suffix.lower() in OPENAI_ACCEPTED_AUDIO_FORMATS:
+            return str(file_path)
+        AudioSegment = _import_audio_segment()
         if AudioSegment is None:
             return str(file_path)
         
@@ -780,56 +1521,107 @@ class AudioAnalyzer:
         """
         return MUSIC_TRANSCRIPTION_PROMPT
     
-    def transcribe_audio(self, file_path: str, debug: bool = False) -> str:
+    def transcribe_audio(self, file_path: str, debug: bool = False, post_process: bool = True, enhanced_file: Optional[str] = None) -> str:
         """
         Распознает речь в аудиофайле с использованием многоуровневого подхода.
         
         Args:
             file_path: Путь к аудиофайлу
             debug: Включить отладочный вывод
+            post_process: Применять LLM-коррекцию сразу (False — если она выполняется пакетно позже)
+            enhanced_file: Уже подготовленный файл с вокалом (если улучшение выполнено заранее)
             
         Returns:
             Распознанный текст
         """
         self.logger.info(f"ТРАНСКРИПЦИЯ: Начало анализа файла: {file_path}")
         try:
+            # Тишина: нечего распознавать, обходимся без улучшения и запросов к API
+            if self._is_silent_audio(file_path):
+                self.logger.info("ТРАНСКРИПЦИЯ: Файл распознан как тишина — пропускаем")
+                if debug:
+                    print("🔇 Файл содержит только тишину — распознавание пропущено")
+                return ""
+            
             # Улучшаем качество аудио для лучшей транскрипции
-            enhanced_file = self._enhance_audio_for_transcription(file_path)
+            if enhanced_file is None:
+                enhanced_file = self._enhance_audio_for_transcription(file_path)
+            
+            # Речи нет даже в выделенном вокале — классификацию выполнят аудиопризнаки.
+            # На исходной смеси (без выделения вокала) VAD пропускает пение, поэтому
+            # там он нужен только для разбиения длинных файлов: короткий файл ради него
+            # не декодируется (длительность берётся из заголовка)
+            speech = None
+            if enhanced_file != file_path or self._audio_duration(Path(enhanced_file)) > LONG_AUDIO_SPLIT_SECONDS:
+                speech = self._detect_speech(enhanced_file)
+            if speech is not None and not speech[1] and enhanced_file != file_path:
+                self.logger.info("ТРАНСКРИПЦИЯ: VAD не обнаружил речи — пропускаем распознавание")
+                if debug:
+                    print("🔇 Речь не обнаружена (VAD) — распознавание пропущено")
+                return ""
             
             strict_prompt = self._get_transcription_prompt()
             self.logger.debug(f"ТРАНСКРИПЦИЯ: Использован промпт: {strict_prompt}")
             
+            # Файл читается с диска один раз и переиспользуется во всех попытках;
+            # длинный файл делится по паузам на части, распознаваемые параллельно
+            audio_parts = self._read_audio_parts(enhanced_file, speech)
+            
             # Попытка 1: Основной язык (ru) на улучшенном файле
             self.logger.debug(f"ТРАНСКРИПЦИЯ: Попытка 1 - основной язык: {self.primary_language}")
-            result = self._transcribe_with_language(enhanced_file, self.primary_language, strict_prompt, debug)
+            result = self._transcribe_parts(audio_parts, self.primary_language, strict_prompt, debug)
             self.logger.debug(f"ТРАНСКРИПЦИЯ: Результат 1: '{result}' (длина: {len(result)})")
 
+            # Законченная фраза не перераспознаётся; остальные попытки ограничены MAX_TRANSCRIPTION_ATTEMPTS
+            attempts_left = MAX_TRANSCRIPTION_ATTEMPTS - 1
+            if self._is_complete_utterance(result) or self._is_acceptable_result(result, strict_prompt):
+                self.logger.debug("ТРАНСКРИПЦИЯ: Результат 1 принят, дополнительные попытки не нужны")
+                attempts_left = 0
+
+            # Попытка 2 нужна, если результат короткий; пока идёт её запрос, музыкальные признаки
+            # считаются локально. Музыкальные запросы отправляются только если результат 2 не принят
+            need_auto = attempts_left > 0 and len(result) < MIN_RESULT_LENGTH_FOR_ALT_LANG
+            musicality_future = None
+            if (OVERLAP_MUSIC_ANALYSIS and need_auto and attempts_left > 1
+                    and len(result) < MIN_RESULT_LENGTH_FOR_MUSIC_PROMPT):
+                musicality_future = self._feature_pool.submit(self._is_instrumental_music, file_path)
+
             # Попытка 2: Авто-язык (если коротко) — также на улучшенном файле
-            if len(result) < MIN_RESULT_LENGTH_FOR_ALT_LANG:
+            if need_auto:
+                attempts_left -= 1
                 self.logger.debug("ТРАНСКРИПЦИЯ: Попытка 2 - авто-язык")
-                result_auto = self._transcribe_with_language(enhanced_file, None, strict_prompt, debug)
+                result_auto = self._transcribe_parts(audio_parts, None, strict_prompt, debug)
                 self.logger.debug(f"ТРАНСКРИПЦИЯ: Результат 2: '{result_auto}' (длина: {len(result_auto)})")
                 if len(result_auto) > len(result):
                     result = result_auto
+                # Осмысленный текст на авто-языке — музыкальный промпт уже не нужен
+                if self._is_acceptable_result(result, strict_prompt):
+                    self.logger.debug("ТРАНСКРИПЦИЯ: Результат 2 принят, дополнительные попытки не нужны")
+                    attempts_left = 0
 
             # Попытка 3: Музыкальный промпт (если всё ещё коротко) — только если по аудиопризнакам это похоже на музыку
-            if len(result) < MIN_RESULT_LENGTH_FOR_MUSIC_PROMPT:
+            if attempts_left > 0 and len(result) < MIN_RESULT_LENGTH_FOR_MUSIC_PROMPT:
                 try:
-                    looks_musical = self._is_instrumental_music(file_path)
+                    if musicality_future is not None:
+                        looks_musical = musicality_future.result()
+                    else:
+                        looks_musical = self._is_instrumental_music(file_path)
                 except Exception:
                     looks_musical = False
                 if looks_musical:
+                    attempts_left -= 1
                     self.logger.debug("ТРАНСКРИПЦИЯ: Попытка 3 - музыкальный промпт (обнаружены музыкальные признаки)")
                     music_prompt = self._get_music_transcription_prompt()
-                    result_music = self._transcribe_with_language(enhanced_file, None, music_prompt, debug)
+                    result_music = self._transcribe_parts(audio_parts, None, music_prompt, debug)
                     self.logger.debug(f"ТРАНСКРИПЦИЯ: Результат музыкального промпта: '{result_music}' (длина: {len(result_music)})")
                     if len(result_music) > len(result):
                         result = result_music
                     
                     # Английский язык для музыкальных файлов (если всё ещё коротко)
-                    if len(result) < MIN_RESULT_LENGTH_FOR_MUSIC_PROMPT:
+                    if attempts_left > 0 and len(result) < MIN_RESULT_LENGTH_FOR_MUSIC_PROMPT:
+                        attempts_left -= 1
                         self.logger.debug("ТРАНСКРИПЦИЯ: Доп. шаг - английский язык с музыкальным промптом")
-                        result_en_music = self._transcribe_with_language(enhanced_file, "en", music_prompt, debug)
+                        result_en_music = self._transcribe_parts(audio_parts, "en", music_prompt, debug)
                         self.logger.debug(f"ТРАНСКРИПЦИЯ: Результат англ. музыкального промпта: '{result_en_music}' (длина: {len(result_en_music)})")
                         if len(result_en_music) > len(result):
                             result = result_en_music
@@ -840,7 +1632,7 @@ class AudioAnalyzer:
             result = self._filter_prompt_from_result(result, strict_prompt)
             
             # Пост-обработка с LLM для коррекции ошибок (если включена)
-            if self.enable_post_process and result and len(result.strip()) > MIN_TEXT_LENGTH_FOR_POST_PROCESS:
+            if post_process and self._needs_post_process(result):
                 self.logger.debug("ТРАНСКРИПЦИЯ: Применяем пост-обработку")
                 result = self._post_process_transcription(result, debug)
             
@@ -852,6 +1644,22 @@ class AudioAnalyzer:
     
     
     
+    def _is_complete_utterance(self, text: str) -> bool:
+        """
+        Возвращает True, если результат достаточно длинный и заканчивается финальной
+        пунктуацией — вероятно, фраза распознана целиком и повторные попытки не нужны.
+        """
+        return len(text) >= MIN_RESULT_LENGTH_FOR_ALT_LANG and text.rstrip().endswith(SENTENCE_END_CHARS)
+    
+    def _is_acceptable_result(self, text: str, prompt: str) -> bool:
+        """
+        Возвращает True, если после фильтрации промпта результат не короче
+        MIN_ACCEPTABLE_RESULT_LENGTH и не похож на галлюцинацию — повторные
+        попытки с другим языком или промптом его не улучшат.
+        """
+        filtered = self._filter_prompt_from_result(text, prompt)
+        return len(filtered) >= MIN_ACCEPTABLE_RESULT_LENGTH and not self._is_likely_hallucination(filtered)
+    
     def _is_likely_hallucination(self, text: str) -> bool:
         """
         Определяет, является ли текст вероятной галлюцинацией модели.
@@ -866,15 +1674,13 @@ class AudioAnalyzer:
         if not text or len(text) < 3:
             return False
         
-        import re
-        
         # 1. Очевидные галлюцинации - очень короткие тексты с символами
-        if len(text) <= 5 and re.match(r'^[.!?,#\-_]+$', text):
+        if len(text) <= 5 and _RE_SYMBOLS_ONLY.match(text):
             self.logger.debug(f"ГАЛЛЮЦИНАЦИЯ: текст '{text}' отфильтрован - только символы")
             return True
         
         # 2. Тексты состоящие только из символов (без букв)
-        if re.match(r'^[^а-яёa-z\s]+$', text):
+        if _RE_NO_LETTERS.match(text):
             self.logger.debug(f"ГАЛЛЮЦИНАЦИЯ: текст '{text}' отфильтрован - только символы")
             return True
         
@@ -884,12 +1690,12 @@ class AudioAnalyzer:
             return True
         
         # 4. Тексты с множественными символами подряд (4+ одинаковых символа)
-        if re.search(r'(.)\1{3,}', text):  # 4+ одинаковых символа подряд
+        if _RE_REPEATED_CHAR.search(text):
             self.logger.debug(f"ГАЛЛЮЦИНАЦИЯ: текст '{text}' отфильтрован - множественные символы")
             return True
         
         # 5. Детский плач - повторяющиеся гласные (5+ подряд)
-        if re.search(r'[аоуэыиеёюя]{5,}', text.lower()):
+        if _RE_VOWEL_RUN.search(text.lower()):
             self.logger.debug(f"ГАЛЛЮЦИНАЦИЯ: текст '{text}' отфильтрован - детский плач")
             return True
         
@@ -922,7 +1728,7 @@ class AudioAnalyzer:
             return result
         
         result_lower = result.lower().strip()
-        prompt_lower = prompt.lower().strip()
+        prompt_lower = _normalized_prompt(prompt)
         
         # 1. Проверяем, содержит ли результат промпт (только если результат очень похож на промпт)
         if result_lower == prompt_lower:
@@ -936,16 +1742,13 @@ class AudioAnalyzer:
                 self.logger.warning(f"ФИЛЬТРАЦИЯ: Результат содержит большую часть промпта - отфильтровано")
                 return ""
         
-        # 2. Проверяем на частичное совпадение с ключевыми фразами промпта
-        prompt_keywords = [
-            "дословную", "полную", "транскрипцию", "без перевода", 
-            "сохраняй язык", "не интерпретируй", "не сокращай", "не исправляй"
-        ]
-        
-        keyword_matches = sum(1 for keyword in prompt_keywords if keyword in result_lower)
-        if keyword_matches > len(prompt_keywords) // 2:
-            self.logger.warning(f"ФИЛЬТРАЦИЯ: Найдено {keyword_matches} ключевых слов промпта - отфильтровано")
-            return ""
+        # 2. Проверяем на частичное совпадение с ключевыми фразами промпта (один проход по тексту;
+        # короткий результат не может содержать достаточно фраз — проверку пропускаем)
+        if len(result_lower) >= _PROMPT_KEYWORDS_MIN_LENGTH:
+            keyword_matches = len(set(_PROMPT_KEYWORDS_RE.findall(result_lower)))
+            if keyword_matches > len(_PROMPT_KEYWORDS) // 2:
+                self.logger.warning(f"ФИЛЬТРАЦИЯ: Найдено {keyword_matches} ключевых слов промпта - отфильтровано")
+                return ""
         
         # 3. Проверяем на галлюцинации - подозрительные паттерны
         if self._is_likely_hallucination(result_lower):
@@ -955,12 +1758,79 @@ class AudioAnalyzer:
         self.logger.debug(f"ФИЛЬТРАЦИЯ: Текст прошел фильтрацию: '{result}'")
         return result
     
-    def _transcribe_with_language(self, file_path: str, language: Optional[str], prompt: str, debug: bool) -> str:
+    def _read_audio_file(self, file_path: str) -> Tuple[str, bytes]:
+        """
+        Читает аудиофайл в память один раз для всех попыток транскрипции.
+        
+        Returns:
+            Кортеж (имя файла, содержимое) в формате, который принимает OpenAI SDK
+        """
+        return Path(file_path).name, Path(file_path).read_bytes()
+    
+    def _read_audio_parts(self, file_path: str, speech: Optional[tuple]) -> List[Tuple[str, bytes]]:
+        """
+        Готовит аудио к распознаванию: короткий файл — целиком, а файл длиннее
+        LONG_AUDIO_SPLIT_SECONDS — частями около SEGMENT_TARGET_SECONDS в WAV 16 кГц / 16 бит.
+        Паузы между фрагментами речи (VAD) служат только точками разреза: части идут
+        встык и вместе покрывают весь сигнал, ведь VAD может пропустить пение.
+        
+        Args:
+            file_path: Путь к файлу для распознавания
+            speech: Результат _detect_speech (None — VAD недоступен, файл не делится)
+            
+        Returns:
+            Части в формате OpenAI SDK (имя файла, содержимое) в порядке следования
+        """
+        if speech is None or len(speech[0]) <= LONG_AUDIO_SPLIT_SECONDS * VAD_SAMPLING_RATE:
+            return [self._read_audio_file(file_path)]
+        
+        import soundfile as sf
+        y, timestamps = speech
+        target = int(SEGMENT_TARGET_SECONDS * VAD_SAMPLING_RATE)
+        spans: List[List[int]] = []
+        for ts in timestamps:
+            if spans and ts['end'] - spans[-1][0] <= target:
+                spans[-1][1] = ts['end']
+            else:
+                spans.append([ts['start'], ts['end']])
+        if len(spans) < 2:
+            return [self._read_audio_file(file_path)]
+        
+        # Разрез — посередине паузы между соседними группами; первая часть начинается
+        # с начала файла, последняя заканчивается в его конце
+        cuts = [0] + [(left[1] + right[0]) // 2 for left, right in zip(spans, spans[1:])] + [len(y)]
+        stem = Path(file_path).stem
+        parts = []
+        for k, (start, end) in enumerate(zip(cuts, cuts[1:])):
+            buffer = io.BytesIO()
+            sf.write(buffer, y[start:end], VAD_SAMPLING_RATE, format='WAV', subtype=VOCALS_SUBTYPE)
+            parts.append((f"{stem}_part{k:03d}.wav", buffer.getvalue()))
+        self.logger.debug(f"ТРАНСКРИПЦИЯ: Длинный файл разделён по паузам на {len(parts)} частей")
+        return parts
+    
+    def _transcribe_parts(self, parts: List[Tuple[str, bytes]], language: Optional[str], prompt: str, debug: bool) -> str:
+        """
+        Распознаёт части файла (см. _read_audio_parts) параллельно и склеивает
+        тексты в исходном порядке; одна часть распознаётся напрямую.
+        """
+        if len(parts) == 1:
+            return self._transcribe_with_language(parts[0], language, prompt, debug)
+        # Каждая часть выполняется в копии текущего контекста, чтобы её ошибки API учитывались за этим файлом
+        contexts = [contextvars.copy_context() for _ in parts]
+        with ThreadPoolExecutor(max_workers=min(API_MAX_WORKERS, len(parts)), thread_name_prefix="segment") as pool:
+            texts = list(pool.map(
+                lambda context, part: context.run(self._transcribe_with_language, part, language, prompt, debug),
+                contexts, parts,
+            ))
+        # Промпт, «протёкший» в одну из частей, отфильтровывается до склейки
+        return " ".join(filter(None, (self._filter_prompt_from_result(text, prompt) for text in texts)))
+    
+    def _transcribe_with_language(self, audio_file: Tuple[str, bytes], language: Optional[str], prompt: str, debug: bool) -> str:
         """
         Выполняет транскрипцию с указанным языком и промптом.
         
         Args:
-            file_path: Путь к аудиофайлу
+            audio_file: Аудио в памяти (имя файла, содержимое), см. _read_audio_file
             language: Язык для распознавания (None для автоопределения)
             prompt: Промпт для транскрипции
             debug: Включить отладочный вывод
@@ -969,17 +1839,17 @@ class AudioAnalyzer:
             Распознанный текст
         """
         try:
-            with open(file_path, 'rb') as audio_file:
-                params = {
-                    "model": "gpt-4o-transcribe",
-                    "file": audio_file,
-                    "response_format": "text",
-                    "prompt": prompt
-                }
-                if language:
-                    params["language"] = language
-                
-                transcript = openai.audio.transcriptions.create(**params)
+            params = {
+                "model": "gpt-4o-transcribe",
+                "file": audio_file,
+                "response_format": "text",
+                "prompt": prompt
+            }
+            if language:
+                params["language"] = language
+            
+            self._throttle()
+            transcript = self._client.audio.transcriptions.create(**params)
             
             result = transcript.strip()
             if debug:
@@ -994,12 +1864,16 @@ class AudioAnalyzer:
             return result
             
         except Exception as e:
+            self._note_api_error()
             # Улучшим читаемость типичных сетевых/региональных ошибок
             error_text = str(e)
             if "unsupported_country_region_territory" in error_text or "403" in error_text:
-                if debug and not self._region_error_notified:
+                with self._state_lock:
+                    notify = debug and not self._region_error_notified
+                    if notify:
+                        self._region_error_notified = True
+                if notify:
                     print("❌ Доступ к API ограничен по региону (403). Проверьте VPN/прокси или регион аккаунта OpenAI.")
-                    self._region_error_notified = True
             if debug:
                 lang_label = language or "автоопределение"
                 print(f"❌ Ошибка с языком ({lang_label}): {e}")
@@ -1021,40 +1895,59 @@ class AudioAnalyzer:
             # чтобы не выполнять повторную транскрипцию и сохранить согласованность.
             if transcript_text is None:
                 strict_prompt = self._get_transcription_prompt()
-                transcript_text = self._transcribe_with_language(file_path, self.primary_language, strict_prompt, False)
+                transcript_text = self._transcribe_with_language(self._read_audio_file(file_path), self.primary_language, strict_prompt, False)
                 transcript_text = self._filter_prompt_from_result(transcript_text, strict_prompt)
 
-            # Эвристика: явный шум по тексту → шум (перекрывает вокализации)
-            if transcript_text and self._looks_like_noise(transcript_text):
-                return "шум"
-
-            # Эвристика: короткие вокализации («la», «na», «ah», «о-о-о») → музыка
-            if transcript_text and self._looks_like_vocalizations(transcript_text):
-                return "музыка"
-            
-            if not transcript_text:
-                # Пустая транскрипция: проверим простые аудиопризнаки (ритм/тональность) для инструментальной музыки
-                if self._is_instrumental_music(file_path):
-                    return "музыка"
-                return "шум"
+            audio_type = self._classify_by_heuristics(file_path, transcript_text)
+            if audio_type is not None:
+                return audio_type
             
             # Используем ИИ для классификации
-            classification_result = self._classify_with_ai(transcript_text)
-
-            # Если ИИ дал "шум", но по признакам файл инструментальная музыка — корректируем на "музыка"
-            if classification_result == "шум":
-                try:
-                    if self._is_instrumental_music(file_path):
-                        return "музыка"
-                except Exception:
-                    pass
-            
-            return classification_result
+            return self._adjust_ai_classification(file_path, self._classify_with_ai(transcript_text))
             
         except Exception as e:
             print(f"Ошибка классификации аудио: {e}")
             return "шум"
 
+    def _classify_by_heuristics(self, file_path: str, transcript_text: str) -> Optional[str]:
+        """
+        Классификация без обращения к ИИ по тексту и аудиопризнакам.
+        
+        Returns:
+            Категория аудио или None, если нужна ИИ-классификация
+        """
+        # Эвристика: явный шум по тексту → шум (перекрывает вокализации)
+        if transcript_text and self._looks_like_noise(transcript_text):
+            return "шум"
+
+        # Эвристика: короткие вокализации («la», «na», «ah», «о-о-о») → музыка
+        if transcript_text and self._looks_like_vocalizations(transcript_text):
+            return "музыка"
+        
+        if not transcript_text:
+            if self._is_silent_audio(file_path):
+                return "шум"
+            # Пустая транскрипция: проверим простые аудиопризнаки (ритм/тональность) для инструментальной музыки
+            if self._is_instrumental_music(file_path):
+                return "музыка"
+            return "шум"
+        
+        return None
+
+    def _adjust_ai_classification(self, file_path: str, classification_result: str) -> str:
+        """
+        Корректирует ответ ИИ по аудиопризнакам.
+        """
+        # Если ИИ дал "шум", но по признакам файл инструментальная музыка — корректируем на "музыка"
+        if classification_result == "шум":
+            try:
+                if self._is_instrumental_music(file_path):
+                    return "музыка"
+            except Exception:
+                pass
+        
+        return classification_result
+
     def _looks_like_vocalizations(self, text: str) -> bool:
         """
         Возвращает True, если текст похож на вокализации/междометия без связной речи
@@ -1062,18 +1955,23 @@ class AudioAnalyzer:
         """
         if not text:
             return False
-        import re
         t = text.lower()
         # Наличие повторяющихся вокальных слогов
-        patterns = [r"\b(la)+\b", r"\b(na)+\b", r"\b(da)+\b", r"\b(ba)+\b",
-                    r"\b(ah|aah|aaa)+\b", r"\b(oh|ooh|ooo)+\b", r"\b(yeah|yea)+\b"]
-        if any(re.search(p, t) for p in patterns):
-            return True
-        # Короткий текст с повторяющимися слогами/междометиями
-        words = re.findall(r"[a-zа-яё]+", t)
-        if len(" ".join(words)) <= 40 and len(set(words)) <= max(1, len(words)//2):
+        if _RE_VOCAL.search(t):
             return True
-        return False
+        # Короткий текст с повторяющимися слогами/междометиями (слова через пробел не длиннее
+        # 40 символов); на длинном тексте проход прекращается сразу после превышения
+        count = 0
+        joined_length = -1
+        unique = set()
+        for match in _RE_WORDS.finditer(t):
+            word = match.group()
+            joined_length += len(word) + 1
+            if joined_length > 40:
+                return False
+            count += 1
+            unique.add(word)
+        return len(unique) <= max(1, count // 2)
 
     def _looks_like_noise(self, text: str) -> bool:
         """
@@ -1082,81 +1980,134 @@ class AudioAnalyzer:
         """
         if not text:
             return False
-        import re
         t = text.strip().lower()
         # Очень короткая строка без пробелов и пунктуации → шум
-        if len(t) <= 3 and ' ' not in t and re.fullmatch(r"[\W_\-–—~]+|[a-zа-яё]+", t):
+        if len(t) <= 3 and ' ' not in t and _RE_SHORT_TOKEN.fullmatch(t):
             # Если это не явная вокализация
             if not self._looks_like_vocalizations(t):
                 return True
         # Повторяющиеся согласные, характерные для "шумов" (ш/щ/с/з/h)
-        if re.fullmatch(r"[шщсзh]+", t) and len(t) <= 10:
+        if _RE_HISS.fullmatch(t) and len(t) <= 10:
             return True
-        # Почти нет слов: 1 короткое "слово" до 3-4 символов
-        words = re.findall(r"[a-zа-яё]+", t)
+        # Почти нет слов: 1 короткое "слово" до 3-4 символов (достаточно первых двух совпадений)
+        words = [match.group() for match in islice(_RE_WORDS.finditer(t), 2)]
         if len(words) <= 1 and (len(t) <= 4 or (words and len(words[0]) <= 3)):
             if not self._looks_like_vocalizations(t):
                 return True
         return False
 
+    def _is_silent_audio(self, file_path: str) -> bool:
+        """
+        Дешёвая предварительная проверка: True, если почти все кадры файла — тишина или тихий фон.
+        Такие файлы не отправляются на распознавание. Результат кэшируется по (путь, mtime, размер).
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        return _compute_silence(file_path, stat.st_mtime, stat.st_size)
+    
+    def _get_vad(self):
+        """
+        Загружает Silero VAD один раз (при первом использовании) через torch.hub.
+        
+        Returns:
+            Кортеж (модель, get_speech_timestamps) или False, если torch/модель недоступны
+        """
+        with self._vad_lock:
+            if self._vad is None:
+                try:
+                    import torch
+                    with suppress_external_noise():
+                        model, utils = torch.hub.load(VAD_MODEL_REPO, "silero_vad", trust_repo=True, verbose=False)
+                    self._vad = (model, utils[0])
+                    self.logger.debug("VAD: Модель Silero VAD загружена")
+                except Exception as e:
+                    self.logger.warning(f"VAD: Не удалось загрузить Silero VAD, проверка речи отключена: {e}")
+                    self._vad = False
+            return self._vad
+    
+    def _detect_speech(self, file_path: str) -> Optional[tuple]:
+        """
+        Находит фрагменты речи или пения локально (Silero VAD).
+        
+        Returns:
+            Кортеж (сигнал 16 кГц, список {'start', 'end'} в отсчётах) или None,
+            если VAD выключен, недоступен или завершился ошибкой
+        """
+        if not ENABLE_SPEECH_VAD:
+            return None
+        vad = self._get_vad()
+        if not vad:
+            return None
+        try:
+            import librosa
+            import torch
+            model, get_speech_timestamps = vad
+            y, _ = librosa.load(file_path, sr=VAD_SAMPLING_RATE, mono=True)
+            with self._vad_lock, torch.no_grad():
+                timestamps = get_speech_timestamps(torch.from_numpy(y), model, sampling_rate=VAD_SAMPLING_RATE)
+            return y, timestamps
+        except Exception as e:
+            self.logger.warning(f"VAD: Ошибка проверки речи для {file_path}: {e}")
+            return None
+    
+    def _start_warmup(self) -> None:
+        """
+        Один раз за сеанс запускает в фоновом потоке прогрев локальных моделей:
+        загрузку Silero VAD (при выделении вокала) с пробным прогоном 0,5 с тишины и компиляцию ядра
+        медианного фильтра. Пока идут конвертация, проверка тишины и выделение
+        вокала, первый файл перестаёт ждать их инициализации.
+        """
+        with self._state_lock:
+            if self._warmup_started:
+                return
+            self._warmup_started = True
+        threading.Thread(target=self._warmup, name="warmup", daemon=True).start()
+    
+    def _warmup(self) -> None:
+        """
+        Тело фонового прогрева (см. _start_warmup); ошибки только логируются.
+        """
+        try:
+            import numpy as np
+            _median_filter_1d(np.zeros((2, 64), dtype=np.float32), 31, axis=1)
+            # Без выделения вокала VAD нужен только длинным файлам и загружается по требованию
+            vad = self._get_vad() if ENABLE_SPEECH_VAD and ENABLE_AUDIO_ENHANCEMENT else None
+            if vad:
+                import torch
+                model, get_speech_timestamps = vad
+                with self._vad_lock, torch.no_grad():
+                    get_speech_timestamps(torch.zeros(VAD_SAMPLING_RATE // 2), model, sampling_rate=VAD_SAMPLING_RATE)
+            self.logger.debug("ПРОГРЕВ: Локальные модели готовы")
+        except Exception as e:
+            self.logger.debug(f"ПРОГРЕВ: Не удалось прогреть модели: {e}")
+    
+    def _has_speech(self, file_path: str) -> bool:
+        """
+        Проверяет локально (Silero VAD), есть ли в файле речь или пение.
+        При недоступном VAD или ошибке возвращает True, чтобы не терять распознавание.
+        """
+        speech = self._detect_speech(file_path)
+        return speech is None or bool(speech[1])
+    
     def _is_instrumental_music(self, file_path: str) -> bool:
         """
         Грубая проверка на инструментальную музыку по аудиопризнакам, если речи нет.
         Использует librosa: HPSS (гармоническая составляющая), темп/ритм, спектральная плоскостность,
         хрома (гармоничность) и активность онсетов. Возвращает True при преобладании музыкальных признаков.
+        Результат кэшируется по (путь, mtime, размер).
         """
         try:
-            import librosa
-            import numpy as np
-            y, sr = librosa.load(file_path, sr=None, mono=True)
-            if y is None or len(y) == 0:
-                return False
-
-            # HPSS: доля гармонической энергии
-            H, P = librosa.effects.hpss(librosa.stft(y))
-            harm_energy = float(np.sum(np.abs(H)))
-            perc_energy = float(np.sum(np.abs(P)))
-            total_energy = harm_energy + perc_energy + 1e-9
-            harmonic_ratio = harm_energy / total_energy
-
-            # Онсет-энергия и темп
-            onset_env = librosa.onset.onset_strength(y=y, sr=sr)
-            tempo, _ = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr)
-            onset_mean = float(np.mean(onset_env))
-
-            # Если темп не определился, оценим ритмичность по автокорреляции онсетов
-            def has_periodic_onsets(env: np.ndarray) -> bool:
-                if env.size < 64:
-                    return False
-                env = (env - env.mean()) / (env.std() + 1e-9)
-                corr = np.correlate(env, env, mode='full')[env.size-1:]
-                corr[0] = 0.0
-                peak = float(np.max(corr[: min(len(corr), 512)]))
-                return peak > 20.0
-
-            # Спектральная плоскостность (музыка обычно менее «плоская», чем шум)
-            S_mag, _ = librosa.magphase(librosa.stft(y))
-            flatness = float(np.mean(librosa.feature.spectral_flatness(S=S_mag)))
-
-            # Хрома: стабильно выраженная гармоничность (вариативность и энергия)
-            chroma = librosa.feature.chroma_stft(S=S_mag, sr=sr)
-            chroma_energy = float(np.mean(chroma))
-            chroma_var = float(np.mean(np.var(chroma, axis=1)))
-
-            # Признаки (пороги ещё более мягкие для электронной/поп музыки)
-            rhythmic = (tempo >= 30.0) or has_periodic_onsets(onset_env)
-            harmonic = (harmonic_ratio >= 0.20) or (chroma_energy >= 0.10 and chroma_var >= 0.002)
-            non_flat = flatness < 0.70
-            onset_active = onset_mean > 0.06
-
-            score = sum([rhythmic, harmonic, non_flat, onset_active])
-            return score >= 2
-        except Exception:
+            stat = os.stat(file_path)
+        except OSError:
             return False
+        return _compute_musicality(file_path, stat.st_mtime, stat.st_size)
     
     def _classify_with_ai(self, transcript_text: str) -> str:
         """
         Классифицирует аудио с использованием ИИ на основе транскрипции.
+        Ответы кэшируются по нормализованному тексту транскрипции.
         
         Args:
             transcript_text: Распознанный текст
@@ -1164,76 +2115,208 @@ class AudioAnalyzer:
         Returns:
             Категория аудио: 'музыка', 'речь' или 'шум'
         """
+        key = self._classify_cache_key(transcript_text)
+        cached = self._classify_cache.get(key)
+        if cached is not None:
+            self.logger.debug("КЛАССИФИКАЦИЯ: Результат взят из кэша")
+            return cached
+        
         try:
             system_prompt = CLASSIFICATION_PROMPT
 
-            response = openai.chat.completions.create(
+            self._throttle()
+            response = self._client.chat.completions.create(
                 model=LLM_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"Проанализируй следующий транскрипт аудио и классифицируй его:\n\n{transcript_text}"}
                 ],
                 temperature=CLASSIFICATION_TEMPERATURE,
-                max_tokens=CLASSIFICATION_MAX_TOKENS
+                max_tokens=CLASSIFICATION_MAX_TOKENS,
+                response_format={"type": "json_object"}
             )
             
-            result_text = response.choices[0].message.content.strip()
-            
-            # Парсим JSON ответ
-            import json
-            try:
-                result = json.loads(result_text)
-                classification = result.get("classification", "noise")
-                
-                # Преобразуем английские категории в русские
-                if classification == "music":
-                    return "музыка"
-                elif classification == "speech":
-                    return "речь"
-                else:
-                    return "шум"
-                    
-            except json.JSONDecodeError:
-                # Если JSON не парсится, попробуем извлечь категорию из текста
-                result_lower = result_text.lower()
-                if "music" in result_lower or "музыка" in result_lower:
-                    return "музыка"
-                elif "speech" in result_lower or "речь" in result_lower:
-                    return "речь"
-                else:
-                    return "шум"
+            classification = self._parse_classification(response.choices[0].message.content.strip())
                     
         except Exception as e:
+            self._note_api_error()
             print(f"Ошибка ИИ-классификации: {e}")
             return "шум"
+        
+        self._store_classification(key, classification)
+        return classification
     
-    def analyze_audio(self, file_path: Path, debug: bool = False) -> Dict[str, Union[str, float, datetime]]:
+    def _parse_classification(self, result_text: str) -> str:
         """
-        Выполняет полный анализ аудиофайла.
+        Извлекает категорию из ответа ИИ (JSON или, если не парсится, свободный текст).
+        """
+        try:
+            result = _json_loads(result_text)
+            return self._classification_to_ru(result.get("classification", "noise"))
+                
+        except json.JSONDecodeError:
+            # Если JSON не парсится, попробуем извлечь категорию из текста
+            result_lower = result_text.lower()
+            if "music" in result_lower or "музыка" in result_lower:
+                return "музыка"
+            elif "speech" in result_lower or "речь" in result_lower:
+                return "речь"
+            else:
+                return "шум"
+    
+    def _classify_cache_key(self, transcript_text: str) -> str:
+        """
+        Ключ кэша классификации: хэш нормализованного текста транскрипции.
+        """
+        return hashlib.sha1(transcript_text.strip().lower().encode("utf-8")).hexdigest()[:16]
+    
+    def _store_classification(self, key: str, classification: str) -> None:
+        """
+        Запоминает успешный ответ ИИ-классификации.
+        """
+        with self._state_lock:
+            self._classify_cache[key] = classification
+            self._classify_cache_dirty = True
+    
+    def _load_classify_cache(self) -> Dict[str, str]:
+        """
+        Загружает кэш классификации с диска. Кэш, сохранённый для другой модели
+        или другого промпта классификации, игнорируется.
+        """
+        if not CLASSIFY_CACHE_FILE:
+            return {}
+        try:
+            with open(CLASSIFY_CACHE_FILE, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == _CLASSIFY_CACHE_VERSION:
+                return dict(data.get("entries", {}))
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {}
+    
+    def _save_classify_cache(self) -> None:
+        """
+        Сохраняет кэш классификации на диск (вызывается при завершении процесса).
+        """
+        if not CLASSIFY_CACHE_FILE or not self._classify_cache_dirty:
+            return
+        try:
+            cache_path = Path(CLASSIFY_CACHE_FILE)
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = cache_path.with_suffix(".tmp")
+            with self._state_lock:
+                data = {"version": _CLASSIFY_CACHE_VERSION, "entries": dict(self._classify_cache)}
+                self._classify_cache_dirty = False
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            self.logger.warning(f"КЛАССИФИКАЦИЯ: Не удалось сохранить кэш: {e}")
+    
+    def _classification_to_ru(self, classification: str) -> str:
+        """
+        Преобразует английскую категорию из ответа ИИ в русскую.
+        """
+        if classification == "music":
+            return "музыка"
+        elif classification == "speech":
+            return "речь"
+        else:
+            return "шум"
+    
+    def _classify_batch_with_ai(self, transcripts: List[str]) -> List[Tuple[str, bool]]:
+        """
+        Классифицирует несколько транскриптов одним запросом к ИИ (уже известные берутся из кэша).
+        Транскрипты, для которых ответ не разобран, классифицируются по отдельности.
         
         Args:
-            file_path: Путь к аудиофайлу
-            debug: Включить отладочный вывод
+            transcripts: Распознанные тексты
             
         Returns:
-            Словарь с результатами анализа
+            Пары (категория: 'музыка', 'речь' или 'шум'; была ли ошибка API) в порядке транскриптов
         """
-        print(f"\n🔍 Анализирую файл: {file_path.name}")
+        keys = [self._classify_cache_key(text) for text in transcripts]
+        # В запрос попадают только отсутствующие в кэше транскрипции, одинаковые — один раз
+        first_index: Dict[str, int] = {}
+        for i, key in enumerate(keys):
+            if key not in self._classify_cache and key not in first_index:
+                first_index[key] = i
+        pending = list(first_index.values())
+        if len(pending) <= 1:
+            return [self._classify_tracking_errors(text) for text in transcripts]
+        
+        numbered = "\n---\n".join(f"[{n}] {transcripts[i]}" for n, i in enumerate(pending))
+        by_id = {}
+        try:
+            self._throttle()
+            response = self._client.chat.completions.create(
+                model=LLM_MODEL,
+                messages=[
+                    {"role": "system", "content": CLASSIFICATION_PROMPT + CLASSIFICATION_BATCH_PROMPT},
+                    {"role": "user", "content": f"Проанализируй следующие транскрипты аудио и классифицируй каждый:\n\n{numbered}"}
+                ],
+                temperature=CLASSIFICATION_TEMPERATURE,
+                max_tokens=CLASSIFICATION_BATCH_ITEM_TOKENS * len(pending),
+                response_format={"type": "json_object"}
+            )
+            
+            items = _json_loads(response.choices[0].message.content.strip())["items"]
+            by_id = {int(item["id"]): item.get("classification", "noise") for item in items}
+        except Exception as e:
+            self.logger.warning(f"КЛАССИФИКАЦИЯ: Пакетный ответ не разобран, классифицируем по отдельности: {e}")
         
-        # Конвертируем формат если необходимо
-        converted_path = self.convert_audio_format(file_path)
+        for n, i in enumerate(pending):
+            if n in by_id:
+                self._store_classification(keys[i], self._classification_to_ru(by_id[n]))
+        return [self._classify_tracking_errors(text) for text in transcripts]
+    
+    def _classify_tracking_errors(self, text: str) -> Tuple[str, bool]:
+        """
+        Классифицирует транскрипт через _classify_with_ai и сообщает, была ли ошибка API.
+        """
+        with self._track_api_errors() as errors:
+            audio_type = self._classify_with_ai(text)
+        return audio_type, bool(errors)
+    
+    def _needs_post_process(self, text: str) -> bool:
+        """
+        Проверяет, нужна ли тексту LLM-коррекция.
+        """
+        return self.enable_post_process and bool(text) and len(text.strip()) > MIN_TEXT_LENGTH_FOR_POST_PROCESS
+
+    def _transcribe_file(self, file_path: Path, debug: bool = False, post_process: bool = True, converted_path: Optional[str] = None, enhanced_file: Optional[str] = None, announce: bool = True) -> Tuple[str, str]:
+        """
+        Первый этап анализа: конвертация формата и распознавание речи.
+        announce=False — без построчных сообщений (пакетный режим выводит общий счётчик).
+        
+        Returns:
+            Кортеж (путь к сконвертированному файлу, транскрипция)
+        """
+        if announce or debug:
+            print(f"\n🔍 Анализирую файл: {file_path.name}")
+        
+        # Конвертируем формат если необходимо (если ещё не сконвертирован)
+        if converted_path is None:
+            converted_path = self.convert_audio_format(file_path)
         
         if debug:
             print(f"📁 Полный путь: {file_path.absolute()}")
-            print(f"📊 Размер файла: {file_path.stat().st_size / (1024 * 1024):.2f} МБ")
+            print(f"📊 Размер файла: {self._file_size_mb(file_path):.2f} МБ")
         
         # Распознаем речь
-        print("📝 Распознаю речь...")
-        transcript = self.transcribe_audio(converted_path, debug)
-        
+        if announce or debug:
+            print("📝 Распознаю речь...")
+        transcript = self.transcribe_audio(converted_path, debug, post_process=post_process, enhanced_file=enhanced_file)
+        return converted_path, transcript
+
+    def _finalize_analysis(self, file_path: Path, converted_path: str, transcript: str, debug: bool = False, audio_type: Optional[str] = None) -> Dict[str, Union[str, float, datetime]]:
+        """
+        Заключительный этап анализа: классификация (если категория не определена заранее) и сбор результата.
+        """
         # Классифицируем аудио (передаем уже полученную транскрипцию, чтобы не запускать STT повторно)
-        print("🏷️ Классифицирую аудио...")
-        audio_type = self.classify_audio(converted_path, transcript_text=transcript)
+        if audio_type is None:
+            print(f"🏷️ Классифицирую аудио: {file_path.name}")
+            audio_type = self.classify_audio(converted_path, transcript_text=transcript)
         
         if debug:
             print(f"🏷️ Результат классификации: {audio_type}")
@@ -1248,15 +2331,166 @@ class AudioAnalyzer:
         return {
             'file_name': file_path.name,
             'file_path': str(file_path.absolute()),
-            'file_size_mb': file_path.stat().st_size / (1024 * 1024),
+            'file_size_mb': self._file_size_mb(file_path),
             'audio_type': audio_type,
             'transcript': transcript,
             'analysis_time': datetime.now()
         }
+
+    def analyze_audio(self, file_path: Path, debug: bool = False) -> Dict[str, Union[str, float, datetime]]:
+        """
+        Выполняет полный анализ аудиофайла.
+        
+        Args:
+            file_path: Путь к аудиофайлу
+            debug: Включить отладочный вывод
+            
+        Returns:
+            Словарь с результатами анализа
+        """
+        key = self._result_cache_key(file_path)
+        cached = self._load_cached_results([key])
+        if key in cached:
+            print(f"♻️ Результат для {file_path.name} взят из кэша")
+            return self._cached_result(file_path, cached[key])
+        
+        self._start_warmup()
+        with self._track_api_errors() as errors:
+            converted_path, transcript = self._transcribe_file(file_path, debug)
+            result = self._finalize_analysis(file_path, converted_path, transcript, debug)
+        self._store_results([key], [result], [bool(errors)])
+        return result
+    
+    def _result_cache_key(self, file_path: Path) -> Optional[str]:
+        """
+        Ключ кэша результатов (см. _file_fingerprint).
+        
+        Returns:
+            Ключ или None, если кэш отключён или файл не читается
+        """
+        if not self.enable_result_cache or not RESULT_CACHE_FILE:
+            return None
+        return self._file_fingerprint(file_path)
+    
+    def _file_fingerprint(self, file_path: Path) -> Optional[str]:
+        """
+        Отпечаток анализа файла: SHA-256 содержимого (через mmap, без чтения
+        в память целиком) и хэш настроек, влияющих на результат. Одинаковые
+        отпечатки — один и тот же результат анализа.
+        
+        Returns:
+            Отпечаток или None, если файл не читается
+        """
+        try:
+            digest = hashlib.sha256()
+            with _mapped_file(file_path) as mapped:
+                if mapped is not None:
+                    digest.update(mapped)
+        except OSError:
+            return None
+        settings = "|".join(map(str, (
+            self.primary_language, self.secondary_language, self.enable_post_process,
+            ENABLE_AUDIO_ENHANCEMENT, DEMUCS_PRECISION, MAX_TRANSCRIPTION_ATTEMPTS, _CLASSIFY_CACHE_VERSION,
+            MUSIC_MIN_PULSE, MUSIC_MIN_ONSET_MEAN, MUSIC_MIN_CHROMA_VAR, MUSIC_MIN_HARMONIC_RATIO,
+        )))
+        return f"{digest.hexdigest()}:{hashlib.sha1(settings.encode('utf-8')).hexdigest()[:16]}"
+    
+    def _open_result_cache(self) -> sqlite3.Connection:
+        """
+        Открывает базу кэша результатов (SQLite — безопасен при одновременных запусках).
+        """
+        cache_path = Path(RESULT_CACHE_FILE)
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(str(cache_path), timeout=30)
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, audio_type TEXT NOT NULL, transcript TEXT NOT NULL, analysis_time TEXT NOT NULL)"
+        )
+        return db
+    
+    def _load_cached_results(self, keys: List[Optional[str]]) -> Dict[str, Tuple[str, str, str]]:
+        """
+        Возвращает найденные в кэше записи: ключ → (тип аудио, транскрипция, время анализа).
+        """
+        keys = [key for key in keys if key]
+        if not keys:
+            return {}
+        # Записи старше срока годности считаются отсутствующими и перезаписываются новым анализом
+        expired_before = None
+        if self.result_cache_ttl_days is not None:
+            expired_before = datetime.now() - timedelta(days=self.result_cache_ttl_days)
+        found = {}
+        try:
+            with closing(self._open_result_cache()) as db:
+                for key in keys:
+                    row = db.execute(
+                        "SELECT audio_type, transcript, analysis_time FROM results WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None and (expired_before is None or datetime.fromisoformat(row[2]) >= expired_before):
+                        found[key] = row
+        except sqlite3.Error as e:
+            self.logger.warning(f"КЭШ: Не удалось прочитать кэш результатов: {e}")
+        return found
+    
+    def _store_results(self, keys: List[Optional[str]], results: List[Dict[str, Union[str, float, datetime]]], failed: List[bool]) -> None:
+        """
+        Сохраняет результаты в кэш. Пропускаются пустые транскрипции и файлы,
+        при анализе которых были ошибки API (результат мог быть неполным).
+        """
+        rows = [
+            (key, result['audio_type'], result['transcript'], result['analysis_time'].isoformat())
+            for key, result, had_error in zip(keys, results, failed)
+            if key and result['transcript'] and not had_error
+        ]
+        if not rows:
+            return
+        try:
+            with closing(self._open_result_cache()) as db, db:
+                db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            self.logger.warning(f"КЭШ: Не удалось сохранить результаты: {e}")
+    
+    def _cached_result(self, file_path: Path, row: Tuple[str, str, str]) -> Dict[str, Union[str, float, datetime]]:
+        """
+        Собирает результат анализа из записи кэша (в формате _finalize_analysis).
+        """
+        audio_type, transcript, analysis_time = row
+        return {
+            'file_name': file_path.name,
+            'file_path': str(file_path.absolute()),
+            'file_size_mb': self._file_size_mb(file_path),
+            'audio_type': audio_type,
+            'transcript': transcript,
+            'analysis_time': datetime.fromisoformat(analysis_time)
+        }
+    
+    def _note_api_error(self) -> None:
+        """
+        Учитывает неудачный запрос к API в текущей области _track_api_errors (см. _store_results).
+        """
+        errors = _API_ERROR_SCOPE.get()
+        if errors is not None:
+            errors.append(threading.current_thread().name)
+    
+    @contextmanager
+    def _track_api_errors(self) -> Iterator[List[str]]:
+        """
+        Собирает ошибки API, случившиеся внутри блока, включая потоки частей файла
+        (см. _transcribe_parts). Ошибки вложенной области учитываются и во внешней.
+        """
+        errors: List[str] = []
+        token = _API_ERROR_SCOPE.set(errors)
+        try:
+            yield errors
+        finally:
+            _API_ERROR_SCOPE.reset(token)
+            outer = _API_ERROR_SCOPE.get()
+            if outer is not None:
+                outer.extend(errors)
     
     def analyze_all_files(self, folder: str, debug: bool = False) -> List[Dict[str, Union[str, float, datetime]]]:
         """
-        Выполняет пакетный анализ всех аудиофайлов в папке.
+        Выполняет пакетный анализ всех аудиофайлов в папке (см. analyze_batch).
         
         Args:
             folder: Путь к папке с аудиофайлами
@@ -1269,22 +2503,235 @@ class AudioAnalyzer:
         
         try:
             files = self.list_audio_files(folder)
-            print(f"✅ Найдено {len(files)} аудиофайлов")
+        except Exception as e:
+            print(f"❌ Ошибка при пакетном анализе: {e}")
+            return []
+        print(f"✅ Найдено {len(files)} аудиофайлов")
+        return self.analyze_batch(files, debug)
+    
+    def iter_all_files(self, folder: str, debug: bool = False) -> Iterator[Dict[str, Union[str, float, datetime]]]:
+        """
+        Как analyze_all_files, но отдаёт результаты по мере готовности (см. iter_batch).
+        
+        Args:
+            folder: Путь к папке с аудиофайлами
+            debug: Включить отладочный вывод
             
-            results = []
-            for i, file_path in enumerate(files, 1):
-                print(f"\n📁 Обрабатываю файл {i}/{len(files)}: {file_path.name}")
+        Yields:
+            Результаты анализа в порядке обработки
+        """
+        print(f"🔍 Пакетный анализ файлов в папке: {folder}")
+        
+        try:
+            files = self.list_audio_files(folder)
+        except Exception as e:
+            print(f"❌ Ошибка при пакетном анализе: {e}")
+            return
+        print(f"✅ Найдено {len(files)} аудиофайлов")
+        yield from self.iter_batch(files, debug)
+    
+    def analyze_batch(self, files: List[Path], debug: bool = False) -> List[Dict[str, Union[str, float, datetime]]]:
+        """
+        Выполняет пакетный анализ списка аудиофайлов.
+        
+        Сначала для всех файлов выделяется вокал (пакетно на GPU, в фоновом потоке
+        с опережением) и распознаётся речь, затем LLM-коррекция выполняется одним
+        конкурентным пакетом, после чего файлы классифицируются: сначала локальными
+        эвристиками, а оставшиеся — ИИ по CLASSIFICATION_BATCH_SIZE транскриптов
+        в запросе. Распознавание и классификация разных файлов идут параллельно
+        (до API_MAX_WORKERS потоков). Файлы, уже проанализированные с теми же
+        настройками, берутся из кэша результатов.
+        
+        Файлы проходят конвейер частями по BATCH_CHECKPOINT_SIZE, и результаты
+        каждой части сразу сохраняются в кэш: прерванный запуск при повторе
+        продолжается с первой незавершённой части. Не сохраняются только файлы,
+        при анализе которых были ошибки API; с --no-cache контрольных точек нет,
+        и повторный запуск начинается сначала. Порядок обработки — от самых
+        длинных файлов к коротким: длинный файл не остаётся последним в пуле, а
+        в каждую часть попадают файлы близкой длительности.
+        
+        Args:
+            files: Пути к аудиофайлам
+            debug: Включить отладочный вывод
+            
+        Returns:
+            Список результатов анализа в порядке files
+        """
+        by_path = {result['file_path']: result for result in self.iter_batch(files, debug)}
+        absolute = [str(Path(file_path).absolute()) for file_path in files]
+        return [by_path[path] for path in absolute if path in by_path]
+    
+    def iter_batch(self, files: List[Path], debug: bool = False) -> Iterator[Dict[str, Union[str, float, datetime]]]:
+        """
+        Пакетный анализ (см. analyze_batch), отдающий результаты каждой части
+        конвейера сразу после её завершения — до обработки следующей части.
+        
+        Args:
+            files: Пути к аудиофайлам
+            debug: Включить отладочный вывод
+            
+        Yields:
+            Результаты анализа в порядке обработки (от длинных файлов к коротким)
+        """
+        durations = [self._audio_duration(file_path) for file_path in files]
+        order = sorted(range(len(files)), key=lambda i: durations[i], reverse=True)
+        for start in range(0, len(order), BATCH_CHECKPOINT_SIZE):
+            part = [files[i] for i in order[start:start + BATCH_CHECKPOINT_SIZE]]
+            yield from self._analyze_batch_part(part, debug)
+    
+    def _audio_duration(self, file_path: Path) -> float:
+        """
+        Длительность файла в секундах по заголовку (soundfile.info, без декодирования).
+        Для форматов, которые libsndfile не читает, — оценка по размеру (~1 МБ в минуту).
+        """
+        import soundfile as sf
+        try:
+            return sf.info(str(file_path)).duration
+        except Exception:
+            return self._file_size_mb(file_path) * 60.0
+    
+    def _analyze_batch_part(self, files: List[Path], debug: bool = False) -> List[Dict[str, Union[str, float, datetime]]]:
+        """
+        Анализирует одну часть пакета: кэш результатов, затем конвейер для
+        остальных файлов и сохранение их результатов в кэш (см. analyze_batch).
+        """
+        # Файлы, уже проанализированные с теми же настройками, берутся из кэша
+        with ThreadPoolExecutor(max_workers=max(1, min(API_MAX_WORKERS, len(files))), thread_name_prefix="hash") as hash_pool:
+            fingerprints = list(hash_pool.map(self._file_fingerprint, files))
+        keys = fingerprints if self.enable_result_cache and RESULT_CACHE_FILE else [None] * len(files)
+        cached = self._load_cached_results(keys)
+        results = [self._cached_result(path, cached[key]) if key in cached else None for path, key in zip(files, keys)]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if len(pending) < len(files):
+            print(f"♻️ Из кэша взято {len(files) - len(pending)} результатов")
+        
+        # Копии одного и того же файла (дубликаты, зеркала папок) анализируются один раз
+        first_of: Dict[str, int] = {}
+        unique = []
+        for i in pending:
+            if fingerprints[i] is None or first_of.setdefault(fingerprints[i], i) == i:
+                unique.append(i)
+        if len(unique) < len(pending):
+            print(f"🧬 Пропущено {len(pending) - len(unique)} дубликатов")
+        
+        if unique:
+            fresh, failed = self._run_batch_pipeline([files[i] for i in unique], debug)
+            if len(fresh) != len(unique):
+                return [result for result in results if result is not None]
+            for i, result in zip(unique, fresh):
+                results[i] = result
+            self._store_results([keys[i] for i in unique], fresh, failed)
+            for i in pending:
+                if results[i] is None:
+                    original = results[first_of[fingerprints[i]]]
+                    results[i] = self._cached_result(files[i], (
+                        original['audio_type'], original['transcript'], original['analysis_time'].isoformat()
+                    ))
+        
+        return results
+    
+    def _run_batch_pipeline(self, files: List[Path], debug: bool = False) -> Tuple[List[Dict[str, Union[str, float, datetime]]], List[bool]]:
+        """
+        Конвейер пакетного анализа без кэша (см. analyze_batch).
+        
+        Returns:
+            Результаты и флаги «при анализе файла была ошибка API» в порядке files
+        """
+        self._start_warmup()
+        try:
+            api_workers = max(1, min(API_MAX_WORKERS, len(files)))
+            
+            # Конвертация (ffmpeg, если формат не принимается API) и проверка на тишину
+            # выполняются для всех файлов параллельно, а не по одному перед каждым распознаванием
+            with ThreadPoolExecutor(max_workers=api_workers, thread_name_prefix="prepare") as prepare_pool:
+                converted = list(prepare_pool.map(self.convert_audio_format, files))
+                silent = list(prepare_pool.map(self._is_silent_audio, converted))
+            
+            # Тихие файлы сразу получают пустую транскрипцию и не попадают в Demucs и к API
+            active = [i for i in range(len(files)) if not silent[i]]
+            if len(active) < len(files):
+                print(f"🔇 Пропущено {len(files) - len(active)} файлов с тишиной")
+            groups = [[active[j] for j in group] for group in self._plan_demucs_groups([converted[i] for i in active])]
+            
+            # Конвейер: выделение вокала (Demucs/librosa) идёт в отдельном потоке впереди
+            # распознавания, а запросы к OpenAI по разным файлам выполняются параллельно
+            # в пуле api_pool — сетевые ожидания перекрываются друг с другом и с разделением
+            transcribed: List[Tuple[str, str]] = [(path, "") for path in converted]
+            failed = [False] * len(files)
+            # Модель Demucs загружается здесь, в основном потоке, где suppress_external_noise
+            # глушит и stdout/stderr; поток enhance получает уже готовую модель
+            if ENABLE_AUDIO_ENHANCEMENT and active:
+                try:
+                    self._get_demucs_model(self._get_demucs_params()['model'])
+                except Exception as e:
+                    self.logger.debug(f"УЛУЧШЕНИЕ АУДИО: Не удалось заранее загрузить Demucs: {e}")
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="enhance") as enhance_pool, \
+                    ThreadPoolExecutor(max_workers=api_workers, thread_name_prefix="api") as api_pool:
+                enhanced = {}
+                for group in groups:
+                    enhance_pool.submit(self._demucs_batch, [converted[i] for i in group])
+                    for i in group:
+                        enhanced[i] = enhance_pool.submit(self._enhance_audio_for_transcription, converted[i])
+                
+                def transcribe(i: int) -> Tuple[str, str]:
+                    with self._track_api_errors() as errors:
+                        transcript = self._transcribe_file(
+                            files[i], debug, post_process=False,
+                            converted_path=converted[i], enhanced_file=enhanced[i].result(),
+                            announce=False,
+                        )
+                    failed[i] = bool(errors)
+                    return transcript
+                
+                futures = {api_pool.submit(transcribe, i): i for group in groups for i in group}
+                for step, future in enumerate(as_completed(futures), 1):
+                    i = futures[future]
+                    transcribed[i] = future.result()
+                    _report_progress("📁 Распознано", step, len(futures), files[i].name)
+            
+            # Пакетная пост-обработка с LLM (если включена)
+            pending = [i for i, (_, transcript) in enumerate(transcribed) if self._needs_post_process(transcript)]
+            if pending:
+                import asyncio
+                print(f"\n✏️ Пост-обработка {len(pending)} транскрипций...")
+                corrected = asyncio.run(self._post_process_batch([transcribed[i][1] for i in pending]))
+                for i, (text, had_error) in zip(pending, corrected):
+                    transcribed[i] = (transcribed[i][0], text)
+                    failed[i] = failed[i] or had_error
+            
+            # Классификация: локальные эвристики, затем ИИ пакетами для оставшихся транскрипций
+            with ThreadPoolExecutor(max_workers=api_workers, thread_name_prefix="classify") as api_pool:
+                audio_types = list(api_pool.map(lambda item: self._classify_by_heuristics(*item), transcribed))
+                
+                def classify_chunk(chunk: List[int]) -> List[Tuple[str, bool]]:
+                    labels = self._classify_batch_with_ai([transcribed[i][1] for i in chunk])
+                    return [
+                        (self._adjust_ai_classification(transcribed[i][0], label), had_error)
+                        for i, (label, had_error) in zip(chunk, labels)
+                    ]
                 
-                result = self.analyze_audio(file_path, debug)
+                need_ai = [i for i, audio_type in enumerate(audio_types) if audio_type is None]
+                if need_ai:
+                    print(f"\n🏷️ ИИ-классификация {len(need_ai)} транскрипций...")
+                chunks = [need_ai[k:k + CLASSIFICATION_BATCH_SIZE] for k in range(0, len(need_ai), CLASSIFICATION_BATCH_SIZE)]
+                for chunk, labels in zip(chunks, api_pool.map(classify_chunk, chunks)):
+                    for i, (label, had_error) in zip(chunk, labels):
+                        audio_types[i] = label
+                        failed[i] = failed[i] or had_error
+            
+            results = []
+            for file_path, (converted_path, transcript), audio_type in zip(files, transcribed, audio_types):
+                result = self._finalize_analysis(file_path, converted_path, transcript, debug, audio_type=audio_type)
                 results.append(result)
                 
-                print(f"✅ Завершено: {result['audio_type']}")
+                if debug:
+                    print(f"✅ Завершено: {result['file_name']}: {result['audio_type']}")
             
-            return results
+            return results, failed
             
         except Exception as e:
             print(f"❌ Ошибка при пакетном анализе: {e}")
-            return []
+            return [], []
     
     def save_results(self, results: List[Dict[str, Union[str, float, datetime]]], filename: Optional[str] = None, single_file: bool = False) -> str:
         """
@@ -1311,23 +2758,30 @@ class AudioAnalyzer:
         
         filepath = Path(filename)
         
+        # Отчёт собирается целиком и записывается одним вызовом
+        parts = [
+            "="*60 + "\n",
+            "РЕЗУЛЬТАТЫ АНАЛИЗА АУДИОФАЙЛОВ\n",
+            "="*60 + "\n",
+            f"Время анализа: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+            f"Всего файлов: {len(results)}\n\n",
+        ]
+        
+        for i, result in enumerate(results, 1):
+            parts.append(
+                "="*40 + "\n"
+                f"ФАЙЛ {i}: {result['file_name']}\n"
+                + "="*40 + "\n"
+                f"📁 Файл: {result['file_name']}\n"
+                f"📊 Размер: {result['file_size_mb']:.2f} МБ\n"
+                f"🏷️ Тип аудио: {result['audio_type']}\n"
+                f"📝 Распознанный текст:\n"
+                f"   {result['transcript']}\n"
+                f"⏰ Время анализа: {result['analysis_time'].isoformat()}\n\n"
+            )
+        
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write("="*60 + "\n")
-            f.write("РЕЗУЛЬТАТЫ АНАЛИЗА АУДИОФАЙЛОВ\n")
-            f.write("="*60 + "\n")
-            f.write(f"Время анализа: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            f.write(f"Всего файлов: {len(results)}\n\n")
-            
-            for i, result in enumerate(results, 1):
-                f.write("="*40 + "\n")
-                f.write(f"ФАЙЛ {i}: {result['file_name']}\n")
-                f.write("="*40 + "\n")
-                f.write(f"📁 Файл: {result['file_name']}\n")
-                f.write(f"📊 Размер: {result['file_size_mb']:.2f} МБ\n")
-                f.write(f"🏷️ Тип аудио: {result['audio_type']}\n")
-                f.write(f"📝 Распознанный текст:\n")
-                f.write(f"   {result['transcript']}\n")
-                f.write(f"⏰ Время анализа: {result['analysis_time'].isoformat()}\n\n")
+            f.write("".join(parts))
         
         return str(filepath.absolute())
 
@@ -1351,6 +2805,8 @@ def create_argument_parser() -> argparse.ArgumentParser:
          python main.py --file examples/song.mp3 --post-process --no-logging  # С пост-обработкой без логирования
          python main.py --file examples/song.mp3 --enable-post-process  # С включенной пост-обработкой по умолчанию
          python main.py --file examples/song.mp3 --fast-mode --no-logging  # Быстрый режим без логирования
+         python main.py --file examples/song.mp3 --enhance --max-attempts 4  # С улучшением аудио и всеми попытками
+         ls examples/*.mp3 | python main.py --serve  # Постоянный режим: пути из stdin
          # Параметры Demucs задаются только в блоке настроек в начале файла
         """
     )
@@ -1371,7 +2827,8 @@ def create_argument_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         '--file',
         type=str,
-        help='Путь к конкретному файлу для анализа (например: examples/song.mp3)'
+        nargs='+',
+        help='Путь к файлу для анализа (например: examples/song.mp3); несколько файлов анализируются пакетно'
     )
     
     parser.add_argument(
@@ -1421,6 +2878,21 @@ def create_argument_parser() -> argparse.ArgumentParser:
         help='Отключить логирование в файл (по умолчанию включено)'
     )
     
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        default=False,
+        help='Не использовать кэш результатов анализа (по умолчанию включён)'
+    )
+    
+    parser.add_argument(
+        '--cache-ttl',
+        type=float,
+        default=None,
+        metavar='ДНЕЙ',
+        help='Срок годности результатов в кэше, в днях: более старые анализируются заново (по умолчанию бессрочно)'
+    )
+    
     parser.add_argument(
         '--enable-post-process',
         action='store_true',
@@ -1432,35 +2904,184 @@ def create_argument_parser() -> argparse.ArgumentParser:
         '--fast-mode',
         action='store_true',
         default=False,
-        help='Быстрый режим: отключить улучшение аудио и уменьшить количество попыток транскрипции'
+        help='Быстрый режим: отключить улучшение аудио и распознавать с одной попытки'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        default=False,
+        help='Постоянный режим: читать пути файлов/папок из stdin и анализировать их одним процессом '
+             '(отдельные файлы — вне очереди перед файлами из папок)'
+    )
+    
+    parser.add_argument(
+        '--enhance',
+        action='store_true',
+        default=False,
+        help='Включить улучшение аудио (предочистка и выделение вокала Demucs; по умолчанию выключено)'
+    )
+    
+    parser.add_argument(
+        '--max-attempts',
+        type=int,
+        choices=range(1, 5),
+        default=None,
+        metavar='N',
+        help=f'Максимум попыток транскрипции, 1–4 (по умолчанию: {MAX_TRANSCRIPTION_ATTEMPTS})'
     )
     
     
     return parser
 
 
+_RESULTS_RULE = "=" * 50
+_RESULTS_BANNER = f"\n{_RESULTS_RULE}\n📊 РЕЗУЛЬТАТЫ АНАЛИЗА\n{_RESULTS_RULE}\n"
+
+
+def _format_result(result: Dict[str, Union[str, float, datetime]]) -> str:
+    """
+    Форматирует поля одного результата анализа в текстовый блок для консоли.
+    
+    Args:
+        result: Результат анализа
+        
+    Returns:
+        Блок текста с завершающим переводом строки
+    """
+    transcript = result['transcript'] or "Речь не обнаружена"
+    return (
+        f"📁 Файл: {result['file_name']}\n"
+        f"🏷️ Тип аудио: {result['audio_type']}\n"
+        f"📝 Распознанный текст:\n"
+        f"   {transcript}\n"
+    )
+
+
+def print_result(result: Dict[str, Union[str, float, datetime]]) -> None:
+    """
+    Выводит результат анализа одного файла в консоль одной записью.
+    
+    Args:
+        result: Результат анализа
+    """
+    sys.stdout.write(f"{_RESULTS_BANNER}{_format_result(result)}{_RESULTS_RULE}\n")
+    sys.stdout.flush()
+
+
 def print_results(results: List[Dict[str, Union[str, float, datetime]]]) -> None:
     """
-    Выводит результаты анализа в консоль.
+    Выводит результаты анализа в консоль: весь отчёт собирается в строку
+    и записывается одним вызовом.
     
     Args:
         results: Список результатов анализа
     """
-    print("\n" + "="*50)
-    print("📊 РЕЗУЛЬТАТЫ АНАЛИЗА")
-    print("="*50)
-    
+    parts = [_RESULTS_BANNER]
     for i, result in enumerate(results, 1):
-        print(f"\n--- ФАЙЛ {i}/{len(results)} ---")
-        print(f"📁 Файл: {result['file_name']}")
-        print(f"🏷️ Тип аудио: {result['audio_type']}")
-        print(f"📝 Распознанный текст:")
-        if result['transcript']:
-            print(f"   {result['transcript']}")
+        parts.append(f"\n--- ФАЙЛ {i}/{len(results)} ---\n")
+        parts.append(_format_result(result))
+    parts.append(f"\n{_RESULTS_RULE}\n")
+    sys.stdout.write("".join(parts))
+    sys.stdout.flush()
+
+
+class AnalysisScheduler:
+    """
+    Очередь заданий постоянного режима (--serve) поверх одного AudioAnalyzer:
+    модель Demucs, VAD и кэши загружаются один раз на процесс. Задания двух
+    приоритетов — интерактивные (отдельные файлы) и фоновые (файлы из папок);
+    интерактивные выбираются первыми, но уже начатый анализ не прерывается.
+    """
+
+    INTERACTIVE = 0  # Приоритет отдельных файлов
+    BACKGROUND = 1  # Приоритет файлов из папок
+    _STOP = 2  # Маркер завершения — после всех поставленных заданий
+
+    def __init__(self, analyzer: AudioAnalyzer) -> None:
+        self.analyzer = analyzer
+        self._queue: "queue.PriorityQueue[Tuple[int, int, Optional[Path]]]" = queue.PriorityQueue()
+        self._seq = 0  # порядок постановки внутри одного приоритета
+        self._seq_lock = threading.Lock()
+
+    def _put(self, priority: int, file_path: Optional[Path]) -> None:
+        with self._seq_lock:
+            self._seq += 1
+            self._queue.put((priority, self._seq, file_path))
+
+    def submit(self, path: Union[str, Path]) -> None:
+        """
+        Ставит путь в очередь: файл — интерактивным заданием, папку — фоновыми
+        заданиями по каждому найденному аудиофайлу.
+        """
+        path = Path(path)
+        if path.is_dir():
+            files = self.analyzer.list_audio_files(str(path))
+            print(f"📥 В фоновую очередь: {len(files)} файлов из {path}")
+            for file_path in files:
+                self._put(self.BACKGROUND, file_path)
+        elif path.exists():
+            self._put(self.INTERACTIVE, path)
         else:
-            print("   Речь не обнаружена")
+            print(f"❌ Файл не найден: {path}")
+
+    def close(self) -> None:
+        """Завершает работу после выполнения всех поставленных заданий."""
+        self._put(self._STOP, None)
+
+    def run(self, debug: bool = False, save: bool = False) -> None:
+        """
+        Выполняет задания по одному до вызова close(). Работает в вызывающем
+        (основном) потоке, чтобы подавление вывода сторонних библиотек действовало.
+        Ошибка задания выводится, и очередь продолжается со следующего.
+        """
+        while True:
+            _, _, file_path = self._queue.get()
+            if file_path is None:
+                return
+            # Ошибка одного задания (например, файл удалён после постановки) не
+            # останавливает режим: остальные задания очереди выполняются
+            try:
+                result = self.analyzer.analyze_audio(file_path, debug)
+                print_result(result)
+                if save:
+                    saved_file = self.analyzer.save_results([result], single_file=True)
+                    print(f"💾 Результаты сохранены в файл: {saved_file}")
+            except Exception as e:
+                print(f"❌ Ошибка при анализе {file_path.name}: {e}")
+
+
+def serve(analyzer: AudioAnalyzer, args: argparse.Namespace, file_paths: List[Path]) -> None:
+    """
+    Постоянный режим: пути файлов и папок читаются построчно из stdin
+    (вместе с переданными --file/--all-files) до конца ввода.
     
-    print("\n" + "="*50)
+    Args:
+        analyzer: Анализатор, общий для всех заданий
+        args: Аргументы командной строки
+        file_paths: Пути из --file
+    """
+    scheduler = AnalysisScheduler(analyzer)
+    for file_path in file_paths:
+        scheduler.submit(file_path)
+    if args.all_files:
+        scheduler.submit(args.folder)
+
+    def read_stdin() -> None:
+        try:
+            for line in sys.stdin:
+                line = line.strip()
+                if line:
+                    try:
+                        scheduler.submit(line)
+                    except OSError as e:
+                        print(f"❌ {e}")
+        finally:
+            scheduler.close()
+
+    print("🛰️ ПОСТОЯННЫЙ РЕЖИМ: вводите пути к файлам или папкам (по одному в строке, конец ввода — Ctrl+D)")
+    threading.Thread(target=read_stdin, name="serve-stdin", daemon=True).start()
+    scheduler.run(args.debug, args.save)
 
 
 def main() -> None:
@@ -1472,12 +3093,25 @@ def main() -> None:
     if args.no_save:
         args.save = False
     
-    # Настройка быстрого режима
+    # Улучшение аудио и повторные попытки — только по явному запросу
     global ENABLE_AUDIO_ENHANCEMENT, MAX_TRANSCRIPTION_ATTEMPTS
+    ENABLE_AUDIO_ENHANCEMENT = args.enhance
+    if args.max_attempts is not None:
+        MAX_TRANSCRIPTION_ATTEMPTS = args.max_attempts
+    
+    # Настройка быстрого режима
     if args.fast_mode:
         ENABLE_AUDIO_ENHANCEMENT = False
-        MAX_TRANSCRIPTION_ATTEMPTS = 2
-        print("🚀 БЫСТРЫЙ РЕЖИМ ВКЛЮЧЕН: улучшение аудио отключено, количество попыток уменьшено")
+        MAX_TRANSCRIPTION_ATTEMPTS = 1
+        print("🚀 БЫСТРЫЙ РЕЖИМ ВКЛЮЧЕН: улучшение аудио отключено, распознавание с одной попытки")
+    
+    # Пути проверяются до создания анализатора: ошибка в аргументах не тратит
+    # время на загрузку зависимостей и настройку логирования
+    file_paths = [Path(file) for file in args.file or []]
+    missing = [str(path) for path in file_paths if not path.exists()]
+    if missing:
+        print(f"❌ Файл не найден: {', '.join(missing)}")
+        return
     
     try:
         # Инициализируем анализатор с настройками языков
@@ -1485,7 +3119,9 @@ def main() -> None:
             primary_language=args.primary_lang,
             secondary_language=args.secondary_lang,
             enable_post_process=args.post_process or args.enable_post_process,
-            enable_logging=not args.no_logging
+            enable_logging=not args.no_logging,
+            enable_result_cache=not args.no_cache,
+            result_cache_ttl_days=args.cache_ttl
         )
         
         if args.debug:
@@ -1500,34 +3136,30 @@ def main() -> None:
             print(f"📝 Логирование: {'выключено' if args.no_logging else 'включено'}")
             print("-" * 50)
         
+        # Постоянный режим: один анализатор на все задания из stdin
+        if args.serve:
+            serve(analyzer, args, file_paths)
+            return
+        
         results = []
         
-        # Режим 1: Анализ конкретного файла
-        if args.file:
-            file_path = Path(args.file)
-            if not file_path.exists():
-                print(f"❌ Файл не найден: {args.file}")
-                return
-            
-            result = analyzer.analyze_audio(file_path, args.debug)
-            results.append(result)
-            
-            print("\n" + "="*50)
-            print("📊 РЕЗУЛЬТАТЫ АНАЛИЗА")
-            print("="*50)
-            print(f"📁 Файл: {result['file_name']}")
-            print(f"🏷️ Тип аудио: {result['audio_type']}")
-            print(f"📝 Распознанный текст:")
-            if result['transcript']:
-                print(f"   {result['transcript']}")
+        # Режим 1: Анализ конкретных файлов (несколько — одним пакетом)
+        if file_paths:
+            if len(file_paths) > 1:
+                results = analyzer.analyze_batch(file_paths, args.debug)
+                print_results(results)
             else:
-                print("   Речь не обнаружена")
-            print("="*50)
+                result = analyzer.analyze_audio(file_paths[0], args.debug)
+                results.append(result)
+                print_result(result)
         
-        # Режим 2: Пакетный анализ всех файлов
+        # Режим 2: Пакетный анализ всех файлов — результаты выводятся по мере готовности
         elif args.all_files:
-            results = analyzer.analyze_all_files(args.folder, args.debug)
-            print_results(results)
+            for result in analyzer.iter_all_files(args.folder, args.debug):
+                print_result(result)
+                results.append(result)
+            # В сохраняемом отчёте файлы идут в порядке имён, как в списке папки
+            results.sort(key=lambda result: result['file_path'])
         
         # Режим 3: Интерактивный выбор файла
         else:
@@ -1540,18 +3172,7 @@ def main() -> None:
                 if chosen_file:
                     result = analyzer.analyze_audio(chosen_file, args.debug)
                     results.append(result)
-                    
-                    print("\n" + "="*50)
-                    print("📊 РЕЗУЛЬТАТЫ АНАЛИЗА")
-                    print("="*50)
-                    print(f"📁 Файл: {result['file_name']}")
-                    print(f"🏷️ Тип аудио: {result['audio_type']}")
-                    print(f"📝 Распознанный текст:")
-                    if result['transcript']:
-                        print(f"   {result['transcript']}")
-                    else:
-                        print("   Речь не обнаружена")
-                    print("="*50)
+                    print_result(result)
                 else:
                     print("👋 Операция отменена")
                     return
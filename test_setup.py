@@ -3,117 +3,138 @@
 Тестовый скрипт для проверки работы аудиоанализатора
 """
 
+import importlib.util
 import os
 import sys
-from pathlib import Path
 
-def test_audio_analyzer():
-    """Тестирует основные функции аудиоанализатора"""
+_SEPARATOR = "=" * 50  # Разделитель секций вывода
+_REQUIRED_FILES = ('main.py', 'requirements.txt', 'README.md')  # Основные файлы проекта
+_AUDIO_EXTENSIONS = frozenset(('.mp3', '.wav', '.m4a', '.flac'))  # Поддерживаемые форматы аудио
+
+# Подсказка по созданию .env
+_ENV_HELP = (
+    "   Создайте файл .env с содержимым:\n"
+    "   OPENAI_API_KEY=your_openai_api_key_here"
+)
+
+# Зависимости: (модуль, пакет pip, обязательна ли)
+_DEPENDENCIES = (
+    ('openai', 'openai', True),
+    ('dotenv', 'python-dotenv', True),
+    ('questionary', 'questionary', False),
+    ('pydub', 'pydub', False),
+)
+
+def _run_checks(emit) -> bool:
+    """Выполняет проверки, передавая строки вывода в emit"""
     
-    print("🧪 Тестирование аудиоанализатора...")
-    print("=" * 50)
+    emit("🧪 Тестирование аудиоанализатора...")
+    emit(_SEPARATOR)
     
     all_good = True
     
+    # Один проход scandir по текущей папке вместо отдельного stat на каждый путь
+    with os.scandir('.') as entries:
+        project_entries = {entry.name: entry for entry in entries}
+    
     # Проверяем наличие основных файлов
-    required_files = ['main.py', 'requirements.txt', 'README.md']
-    print("📁 Проверка основных файлов:")
-    for file in required_files:
-        if not Path(file).exists():
-            print(f"❌ Файл {file} не найден")
+    emit("📁 Проверка основных файлов:")
+    for file in _REQUIRED_FILES:
+        entry = project_entries.get(file)
+        if entry is None or not entry.is_file():
+            emit(f"❌ Файл {file} не найден")
             all_good = False
         else:
-            print(f"✅ Файл {file} найден")
+            emit(f"✅ Файл {file} найден")
     
     # Проверяем папку examples
-    print("\n📂 Проверка папки examples:")
-    examples_dir = Path('examples')
-    if not examples_dir.exists():
-        print("❌ Папка examples не найдена")
+    emit("\n📂 Проверка папки examples:")
+    examples_dir = 'examples'
+    entry = project_entries.get(examples_dir)
+    if entry is None or not entry.is_dir():
+        emit("❌ Папка examples не найдена")
         all_good = False
     else:
-        print("✅ Папка examples найдена")
+        emit("✅ Папка examples найдена")
         
         # Проверяем наличие аудиофайлов
-        supported_formats = ['*.mp3', '*.wav', '*.m4a', '*.flac']
-        audio_files = []
-        for pattern in supported_formats:
-            audio_files.extend(examples_dir.glob(pattern))
+        # Один проход scandir вместо glob на каждый формат; размер берётся из записи каталога
+        with os.scandir(examples_dir) as entries:
+            audio_files = sorted(
+                (entry for entry in entries
+                 if entry.is_file() and os.path.splitext(entry.name)[1].lower() in _AUDIO_EXTENSIONS),
+                key=lambda entry: entry.name,
+            )
         
         if audio_files:
-            print(f"✅ Найдено {len(audio_files)} аудиофайлов:")
-            for file in audio_files:
-                file_size = file.stat().st_size / (1024 * 1024)
-                print(f"   - {file.name} ({file_size:.1f} МБ)")
+            emit(f"✅ Найдено {len(audio_files)} аудиофайлов:")
+            for entry in audio_files:
+                file_size = entry.stat().st_size / (1024 * 1024)
+                emit(f"   - {entry.name} ({file_size:.1f} МБ)")
         else:
-            print("⚠️ Аудиофайлы в examples/ не найдены")
-            print("   Запустите: python create_test_files.py")
+            emit("⚠️ Аудиофайлы в examples/ не найдены")
+            emit("   Запустите: python create_test_files.py")
     
     # Проверяем .env файл
-    print("\n🔑 Проверка конфигурации:")
-    env_file = Path('.env')
-    if env_file.exists():
-        print("✅ Файл .env найден")
+    emit("\n🔑 Проверка конфигурации:")
+    env_file = '.env'
+    entry = project_entries.get(env_file)
+    if entry is not None and entry.is_file():
+        emit("✅ Файл .env найден")
         try:
-            with open(env_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if 'OPENAI_API_KEY' in content:
-                    print("✅ OPENAI_API_KEY найден в .env")
-                else:
-                    print("⚠️ OPENAI_API_KEY не найден в .env")
-                    all_good = False
+            # Читаем построчно в двоичном режиме и останавливаемся на первом совпадении
+            with open(env_file, 'rb') as f:
+                has_key = any(b'OPENAI_API_KEY' in line for line in f)
+            if has_key:
+                emit("✅ OPENAI_API_KEY найден в .env")
+            else:
+                emit("⚠️ OPENAI_API_KEY не найден в .env")
+                all_good = False
         except Exception as e:
-            print(f"❌ Ошибка чтения .env: {e}")
+            emit(f"❌ Ошибка чтения .env: {e}")
             all_good = False
     else:
-        print("⚠️ Файл .env не найден")
-        print("   Создайте файл .env с содержимым:")
-        print("   OPENAI_API_KEY=your_openai_api_key_here")
-        all_good = False
-    
-    # Проверяем зависимости
-    print("\n📦 Проверка зависимостей:")
-    try:
-        import openai
-        print("✅ openai установлен")
-    except ImportError:
-        print("❌ openai не установлен")
-        print("   Выполните: pip install openai")
-        all_good = False
-    
-    try:
-        from dotenv import load_dotenv
-        print("✅ python-dotenv установлен")
-    except ImportError:
-        print("❌ python-dotenv не установлен")
-        print("   Выполните: pip install python-dotenv")
+        emit("⚠️ Файл .env не найден")
+        emit(_ENV_HELP)
         all_good = False
     
-    # Опциональные зависимости
-    try:
-        import questionary
-        print("✅ questionary установлен (опционально)")
-    except ImportError:
-        print("ℹ️ questionary не установлен (опционально)")
-    
-    try:
-        from pydub import AudioSegment
-        print("✅ pydub установлен (опционально)")
-    except ImportError:
-        print("ℹ️ pydub не установлен (опционально)")
+    # Проверяем зависимости: find_spec находит пакет, не выполняя его __init__
+    emit("\n📦 Проверка зависимостей:")
+    for module, package, required in _DEPENDENCIES:
+        installed = importlib.util.find_spec(module) is not None
+        if required:
+            if installed:
+                emit(f"✅ {package} установлен")
+            else:
+                emit(f"❌ {package} не установлен")
+                emit(f"   Выполните: pip install {package}")
+                all_good = False
+        elif installed:
+            emit(f"✅ {package} установлен (опционально)")
+        else:
+            emit(f"ℹ️ {package} не установлен (опционально)")
     
     # Итоговый результат
-    print("\n" + "=" * 50)
+    emit("\n" + _SEPARATOR)
     if all_good:
-        print("🎉 Все проверки пройдены! Аудиоанализатор готов к работе.")
-        print("\n🎯 Для запуска приложения выполните:")
-        print("   python main.py examples")
-        print("   python main.py --all-files examples")
-        print("   python main.py --file examples/song.mp3")
+        emit("🎉 Все проверки пройдены! Аудиоанализатор готов к работе.")
+        emit("\n🎯 Для запуска приложения выполните:")
+        emit("   python main.py examples")
+        emit("   python main.py --all-files examples")
+        emit("   python main.py --file examples/song.mp3")
     else:
-        print("⚠️ Обнаружены проблемы. Исправьте их перед запуском.")
+        emit("⚠️ Обнаружены проблемы. Исправьте их перед запуском.")
     
     return all_good
 
+def test_audio_analyzer():
+    """Тестирует основные функции аудиоанализатора"""
+    # Вывод копится и печатается одной записью в stdout
+    lines = []
+    try:
+        return _run_checks(lines.append)
+    finally:
+        sys.stdout.write("\n".join(lines) + "\n")
+
 if __name__ == "__main__":
     test_audio_analyzer()